@@ -1,112 +1,1076 @@
+import asyncio
 import sqlite3
 import os
-from datetime import datetime
+import base64
+import itertools
+import re
+import queue
+import threading
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from migrations import Migration, Migrator, user_version
+
+_MISSING = object()
+
+# Column order of a projects row
+PROJECT_COLUMNS = ('id', 'title', 'description', 'image_file_name', 'created_at', 'updated_at')
+
+# Columns that listings and search results show; updated_at is only
+# loaded for single-project lookups and exports
+LISTING_COLUMNS = PROJECT_COLUMNS[:5]
+_PROJECT_SELECT = ', '.join(PROJECT_COLUMNS)
+_LISTING_SELECT = ', '.join(LISTING_COLUMNS)
+
+# How SQLite's CURRENT_TIMESTAMP formats times, and so how every stored
+# timestamp is written
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Control characters wrapped around search matches; callers escape the
+# text and then swap these for markup
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+def parse_timestamp(value):
+    """Parse a stored or imported timestamp into a naive UTC datetime
+    
+    Accepts datetimes and ISO 8601 strings, including ones with a 'T'
+    separator or a UTC offset. Returns None for None or an empty string
+    and raises ValueError for anything else it can't parse.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def format_timestamp(value):
+    """Format a datetime the way timestamps are stored, or None for None"""
+    return value.strftime(TIMESTAMP_FORMAT) if value is not None else None
+
+
+def _load_timestamp(value):
+    """Parse a timestamp read from the database, tolerating malformed values"""
+    try:
+        return parse_timestamp(value)
+    except ValueError:
+        return None
+
+
+class Project:
+    """One project, as returned by DatabaseManager's read methods
+    
+    Timestamps are naive UTC datetimes. Listings leave updated_at as
+    None, since they don't select it.
+    """
+    
+    __slots__ = PROJECT_COLUMNS
+    
+    def __init__(self, id, title, description, image_file_name, created_at=None, updated_at=None):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.image_file_name = image_file_name
+        self.created_at = _load_timestamp(created_at)
+        self.updated_at = _load_timestamp(updated_at)
+    
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row_factory for queries selecting columns in PROJECT_COLUMNS order"""
+        return cls(*row)
+    
+    def to_dict(self, fields=PROJECT_COLUMNS):
+        """Plain mapping of `fields`, with timestamps formatted as stored"""
+        values = {}
+        for name in fields:
+            value = getattr(self, name)
+            values[name] = format_timestamp(value) if isinstance(value, datetime) else value
+        return values
+    
+    def __eq__(self, other):
+        if not isinstance(other, Project) or type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f'{type(self).__name__}(id={self.id!r}, title={self.title!r})'
+
+
+class SearchResult(Project):
+    """A project matched by search_projects, with its highlighted text
+    
+    title_highlight and snippet wrap matches in HIGHLIGHT_START and
+    HIGHLIGHT_END.
+    """
+    
+    __slots__ = ('title_highlight', 'snippet')
+    
+    def __init__(self, id, title, description, image_file_name, created_at, title_highlight, snippet):
+        super().__init__(id, title, description, image_file_name, created_at)
+        self.title_highlight = title_highlight
+        self.snippet = snippet
+    
+    def __eq__(self, other):
+        return (super().__eq__(other) is True
+                and (self.title_highlight, self.snippet) == (other.title_highlight, other.snippet))
+
+
+class ProjectColumns:
+    """Column-oriented, array-backed listing of many projects
+    
+    Ids and creation times live in typed arrays and repeated image file
+    names share one string, so a large listing costs a fraction of a
+    list of Project objects. Indexing or iterating builds Project
+    records on demand.
+    """
+    
+    __slots__ = ('ids', 'created_at', 'titles', 'descriptions', 'image_file_names')
+    
+    def __init__(self):
+        self.ids = array('q')
+        # Seconds since the epoch (UTC); NaN where the time is unknown
+        self.created_at = array('d')
+        self.titles = []
+        self.descriptions = []
+        self.image_file_names = []
+    
+    def append_rows(self, rows):
+        """Append (id, title, description, image_file_name, created_at) rows
+        
+        created_at is in seconds since the epoch, or None if unknown.
+        """
+        if not rows:
+            return
+        ids, titles, descriptions, image_file_names, created_at = zip(*rows)
+        self.ids.extend(ids)
+        self.created_at.extend(float('nan') if created is None else created for created in created_at)
+        self.titles.extend(titles)
+        self.descriptions.extend(descriptions)
+        self.image_file_names.extend(map(sys.intern, image_file_names))
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __getitem__(self, index):
+        created = self.created_at[index]
+        return Project(
+            self.ids[index], self.titles[index], self.descriptions[index],
+            self.image_file_names[index],
+            None if created != created else
+            datetime.fromtimestamp(created, timezone.utc).replace(tzinfo=None))
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+def encode_cursor(project):
+    """Encode a project's (created_at, id) sort key as an opaque page cursor"""
+    raw = f'{format_timestamp(project.created_at)}|{project.id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a page cursor into its (created_at, id) sort key
+    
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, project_id = base64.urlsafe_b64decode(padded).decode('utf-8').rsplit('|', 1)
+        return created_at, int(project_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'Invalid page cursor: {cursor!r}') from e
+
+
+class ConnectionPool:
+    """Thread-safe pool of SQLite connections with per-thread reuse"""
+
+    def __init__(self, connect, size=5, timeout=10.0):
+        """Create a pool that opens at most `size` connections via `connect`"""
+        if size < 1:
+            raise ValueError('Pool size must be at least 1')
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection, reusing the one this thread already holds"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def _acquire(self):
+        """Take an idle connection or open a new one while under the size cap"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f'Timed out waiting for a database connection (pool size {self.size})')
+
+    def close(self):
+        """Close every connection the pool has opened"""
+        with self._lock:
+            connections, self._all = self._all, []
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        for conn in connections:
+            conn.close()
+
+    def after_fork(self):
+        """Forget connections inherited from the parent process without touching them
+
+        SQLite connections must not be used across fork(), and closing one
+        in the child could disturb the parent's locks, so the child starts
+        with an empty pool of its own.
+        """
+        self._inherited = self._all
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results with a per-entry TTL"""
+
+    def __init__(self, max_entries=256, ttl=60.0):
+        """Create a cache holding at most `max_entries` results for `ttl` seconds"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a live cached value and mark it most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation=None):
+        """Store a value unless the cache was invalidated since `generation`"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_where(self, predicate):
+        """Drop every entry whose key matches `predicate`"""
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _has_search_index(conn):
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'")
+    return cursor.fetchone() is not None
+
+
+def _create_schema(cursor):
+    """Migration 1: projects, change tracking, contact messages and search"""
+    # Create projects table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            image_file_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Index matching the listing order so pages are range scans, not sorts
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_projects_created_at_id
+        ON projects (created_at, id)
+    ''')
+    
+    # Single-row table tracking a change counter and last-modified
+    # time for the whole projects table, maintained by triggers so
+    # writes from every process (and bulk imports) are counted
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS projects_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            last_modified TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO projects_meta (id, version, last_modified)
+        SELECT 1, 0, MAX(updated_at) FROM projects
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS projects_meta_insert AFTER INSERT ON projects BEGIN
+            UPDATE projects_meta
+            SET version = version + 1,
+                last_modified = MAX(COALESCE(last_modified, ''), new.updated_at, CURRENT_TIMESTAMP)
+            WHERE id = 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS projects_meta_update AFTER UPDATE ON projects BEGIN
+            UPDATE projects_meta
+            SET version = version + 1,
+                last_modified = MAX(COALESCE(last_modified, ''), new.updated_at, CURRENT_TIMESTAMP)
+            WHERE id = 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS projects_meta_delete AFTER DELETE ON projects BEGIN
+            UPDATE projects_meta
+            SET version = version + 1,
+                last_modified = MAX(COALESCE(last_modified, ''), CURRENT_TIMESTAMP)
+            WHERE id = 1;
+        END
+    ''')
+    
+    # Messages sent through the contact form
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contact_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            message TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            password_hash TEXT
+        )
+    ''')
+    
+    # Tables created before password hashes were stored lack the column
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(contact_messages)')]
+    if 'password_hash' not in columns:
+        cursor.execute('ALTER TABLE contact_messages ADD COLUMN password_hash TEXT')
+    
+    _create_search_index(cursor)
+
+
+def _create_search_index(cursor):
+    """Create the FTS5 index over projects and the triggers that keep it in sync
+    
+    Leaves the index out if this SQLite build has no FTS5, in which case
+    search_projects falls back to a LIKE scan.
+    """
+    if _has_search_index(cursor.connection):
+        return
+    
+    cursor.execute('SAVEPOINT search_index')
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE projects_fts USING fts5(
+                title, description, content='projects', content_rowid='id'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        cursor.execute('ROLLBACK TO search_index')
+        cursor.execute('RELEASE search_index')
+        return
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects BEGIN
+            INSERT INTO projects_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects BEGIN
+            INSERT INTO projects_fts (projects_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF title, description ON projects BEGIN
+            INSERT INTO projects_fts (projects_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO projects_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    ''')
+    # Index projects that existed before the search table did
+    cursor.execute("INSERT INTO projects_fts (projects_fts) VALUES ('rebuild')")
+    cursor.execute('RELEASE search_index')
+
+
+# Every schema change, in order; see migrations.py. A database at an
+# older PRAGMA user_version is upgraded on first use or by `flask db migrate`
+MIGRATIONS = (
+    Migration(1, 'Projects, change tracking, contact messages and search index',
+              _create_schema, table='projects'),
+)
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
 
 class DatabaseManager:
     """Data Access Layer for managing projects database operations"""
     
-    def __init__(self, db_path='projects.db'):
-        """Initialize database connection"""
+    # Cache key kinds that hold a single project rather than a listing
+    _PER_PROJECT_KEYS = ('project', 'exists')
+    
+    # bm25 weights for the (title, description) columns of projects_fts
+    _SEARCH_WEIGHTS = (10.0, 1.0)
+    
+    def __init__(self, db_path='projects.db', pool_size=5, busy_timeout=5.0,
+                 cache_size_kb=8192, mmap_size=64 * 1024 * 1024,
+                 cache_ttl=60.0, cache_entries=256, migrations=MIGRATIONS, tracer=None):
+        """Set up the connection pool and result cache
+        
+        Nothing is opened here: the schema is checked, and `migrations`
+        run if needed, when the database is first used. Connections are
+        traced by `tracer` (a sqltrace.QueryTracer) if one is given.
+        """
         self.db_path = db_path
-        self.init_database()
+        self.tracer = tracer
+        self.busy_timeout = busy_timeout
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.pool = ConnectionPool(self._open_pooled_connection, size=pool_size,
+                                   timeout=busy_timeout)
+        self.cache = QueryCache(cache_entries, cache_ttl) if cache_ttl > 0 else None
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._data_version = None
+        self._fts_enabled = False
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._local = threading.local()
+        self.migrator = Migrator(migrations)
+    
+    @property
+    def fts_enabled(self):
+        """Whether search uses the FTS5 index rather than a LIKE scan"""
+        self.ensure_schema()
+        return self._fts_enabled
+    
+    def ensure_schema(self):
+        """Run init_database once, on first use of the database"""
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                self.init_database()
+                self._schema_ready = True
     
     def get_connection(self):
-        """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        """Get a new, tuned database connection owned by the caller"""
+        self.ensure_schema()
+        return self._connect()
+    
+    def _open_pooled_connection(self):
+        """Open a connection that may be handed between threads by the pool"""
+        return self._connect(check_same_thread=False)
+    
+    def _connect(self, **kwargs):
+        if self.tracer is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, **kwargs)
+            self._configure_connection(conn)
+            return conn
+        conn = self.tracer.connect(self.db_path, timeout=self.busy_timeout, **kwargs)
+        self._configure_connection(conn)
+        self.tracer.install(conn, self.db_path)
+        return conn
+    
+    def _configure_connection(self, conn):
+        """Apply WAL journaling and performance pragmas to a connection"""
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+    
+    def connection(self):
+        """Check out a pooled connection for the duration of a with-block"""
+        self.ensure_schema()
+        return self.pool.connection()
+    
+    def write_connection(self):
+        """Hold the process-wide writer connection for the duration of a with-block
+        
+        All writes from this process go through one connection, so its
+        PRAGMA data_version only moves when another process commits.
+        """
+        self.ensure_schema()
+        return self._writer_connection()
+    
+    @contextmanager
+    def _writer_connection(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._open_pooled_connection()
+            try:
+                yield self._writer
+            finally:
+                if self._writer.in_transaction:
+                    self._writer.rollback()
+    
+    def close(self):
+        """Close all pooled connections and the writer connection"""
+        self.pool.close()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._data_version = None
+    
+    def after_fork(self):
+        """Reset per-process state in a freshly forked worker
+        
+        Connections and locks inherited from the parent are abandoned and
+        reopened lazily, and cached results are dropped because this
+        process has not yet observed the database's data_version.
+        """
+        self.pool.after_fork()
+        self._inherited_writer = self._writer
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._data_version = None
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def _cached(self, key, loader):
+        """Return the cached result for `key`, loading and storing it on a miss"""
+        served = getattr(self._local, 'served', None)
+        if served is not None and key in served:
+            return served[key]
+        
+        if self.cache is None or not self._sync_data_version():
+            value = loader()
+        else:
+            value = self.cache.get(key, _MISSING)
+            if value is _MISSING:
+                generation = self.cache.generation
+                value = loader()
+                self.cache.set(key, value, generation)
+        
+        recorded = getattr(self._local, 'recorded', None)
+        if recorded is not None:
+            recorded[key] = value
+        return value
+    
+    @contextmanager
+    def recording(self):
+        """Collect the results of this thread's lookups, by key, for serving() elsewhere"""
+        results = self._local.recorded = {}
+        try:
+            yield results
+        finally:
+            self._local.recorded = None
+    
+    @contextmanager
+    def serving(self, results):
+        """Answer this thread's lookups from `results` where possible, without the database
+        
+        Lookups missing from `results` still load as usual, so callers
+        that must not block should only serve what they recorded with the
+        very same calls.
+        """
+        self._local.served = results
+        try:
+            yield
+        finally:
+            self._local.served = None
+    
+    def _sync_data_version(self):
+        """Clear the cache if another process has committed since the last check
+        
+        Returns False when the writer is busy, in which case the caller
+        should skip the cache rather than wait.
+        """
+        if not self._writer_lock.acquire(timeout=0.01):
+            return False
+        try:
+            if self._writer is None:
+                self._writer = self._open_pooled_connection()
+            data_version = self._writer.execute('PRAGMA data_version').fetchone()[0]
+            if data_version != self._data_version:
+                if self._data_version is not None:
+                    self.cache.clear()
+                self._data_version = data_version
+            return True
+        finally:
+            self._writer_lock.release()
+    
+    def _invalidate(self, project_id=None):
+        """Drop cached listings and, if given, cached lookups for one project"""
+        if self.cache is None:
+            return
+        self.cache.discard_where(
+            lambda key: key[0] not in self._PER_PROJECT_KEYS or key[1] == project_id)
     
     def init_database(self):
-        """Initialize database and create tables if they don't exist"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Bring the schema up to SCHEMA_VERSION by running pending migrations
         
-        # Create projects table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS projects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                image_file_name TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        A database that is already current costs a single PRAGMA read.
+        Each migration takes the write lock for itself, so processes
+        starting together take turns and only the first does any work.
+        """
+        with self._writer_connection() as conn:
+            applied = self.migrator.migrate(conn)
+            self._fts_enabled = _has_search_index(conn)
+        return applied
+    
+    def migrate(self, batch_size=None, pause=0.0, progress=None):
+        """Run pending migrations now, e.g. ahead of a deploy; returns the ones that ran
         
-        conn.commit()
-        conn.close()
+        Takes the same arguments as Migrator.migrate, so big backfills can
+        be given smaller batches and a pause for writers between them.
+        """
+        with self._schema_lock:
+            with self._writer_connection() as conn:
+                applied = self.migrator.migrate(conn, batch_size, pause, progress)
+                self._fts_enabled = _has_search_index(conn)
+            self._schema_ready = True
+        if applied and self.cache is not None:
+            self.cache.clear()
+        return applied
+    
+    def plan_migrations(self, sample_rows=1000):
+        """Estimate pending migrations by rehearsing them on a sample of the database"""
+        with self._writer_connection() as conn:
+            return self.migrator.estimate(conn, sample_rows)
+    
+    def schema_version(self):
+        """The database's PRAGMA user_version, without running migrations"""
+        with self._writer_connection() as conn:
+            return user_version(conn)
     
     def get_all_projects(self):
         """Retrieve all projects from the database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return list(self._cached(('all',), self._load_all_projects))
+    
+    def _load_all_projects(self):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = Project.from_row
+            cursor.execute(f'SELECT {_LISTING_SELECT} FROM projects ORDER BY created_at DESC, id DESC')
+            return cursor.fetchall()
+    
+    def get_project_columns(self):
+        """Retrieve every project, newest first, as a ProjectColumns listing
+        
+        Meant for large listings; the result is not cached.
+        """
+        columns = ProjectColumns()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            # SQLite converts the timestamps, so no datetime is built per row
+            cursor.execute('''
+                SELECT id, title, description, image_file_name,
+                       CAST(strftime('%s', created_at) AS INTEGER)
+                FROM projects
+                ORDER BY created_at DESC, id DESC
+            ''')
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    return columns
+                columns.append_rows(rows)
+    
+    def get_projects_page(self, after=None, before=None, limit=20):
+        """Retrieve one page of projects, newest first, using keyset pagination
         
-        cursor.execute('SELECT * FROM projects ORDER BY created_at DESC')
-        projects = cursor.fetchall()
+        Pass the `after` cursor to move to older projects or the `before`
+        cursor to move back to newer ones. Returns a tuple of
+        (projects, next_cursor, prev_cursor); a cursor is None when there
+        is no page in that direction. Raises ValueError for a bad cursor.
+        """
+        after_key = decode_cursor(after) if after else None
+        before_key = decode_cursor(before) if before else None
+        return self._cached(('page', after, before, limit),
+                            lambda: self._load_projects_page(after_key, before_key, limit))
+    
+    def _load_projects_page(self, after_key, before_key, limit):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = Project.from_row
+            if before_key is not None:
+                cursor.execute(f'''
+                    SELECT {_LISTING_SELECT} FROM projects
+                    WHERE (created_at, id) > (?, ?)
+                    ORDER BY created_at ASC, id ASC
+                    LIMIT ?
+                ''', (*before_key, limit + 1))
+                rows = cursor.fetchall()
+                if len(rows) <= limit:
+                    # Reached the newest project, so this is really the first page
+                    return self._load_projects_page(None, None, limit)
+                projects = rows[:limit][::-1]
+                return projects, encode_cursor(projects[-1]), encode_cursor(projects[0])
+            
+            if after_key is not None:
+                cursor.execute(f'''
+                    SELECT {_LISTING_SELECT} FROM projects
+                    WHERE (created_at, id) < (?, ?)
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT ?
+                ''', (*after_key, limit + 1))
+            else:
+                cursor.execute(f'''
+                    SELECT {_LISTING_SELECT} FROM projects
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT ?
+                ''', (limit + 1,))
+            rows = cursor.fetchall()
         
-        conn.close()
-        return projects
+        projects = rows[:limit]
+        next_cursor = encode_cursor(projects[-1]) if len(rows) > limit else None
+        prev_cursor = encode_cursor(projects[0]) if after_key is not None and projects else None
+        return projects, next_cursor, prev_cursor
     
     def get_project_by_id(self, project_id):
         """Retrieve a specific project by ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self._cached(('project', project_id),
+                            lambda: self._load_project(project_id))
+    
+    def _load_project(self, project_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = Project.from_row
+            cursor.execute(f'SELECT {_PROJECT_SELECT} FROM projects WHERE id = ?', (project_id,))
+            return cursor.fetchone()
+    
+    def search_projects(self, query, limit=20):
+        """Full-text search over project titles and descriptions, best match first
         
-        cursor.execute('SELECT * FROM projects WHERE id = ?', (project_id,))
-        project = cursor.fetchone()
+        Returns SearchResult records, which add the highlighted title and
+        a highlighted description snippet to the project.
+        """
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        return list(self._cached(('search', tuple(terms), limit),
+                                 lambda: self._load_search(terms, limit)))
+    
+    def _load_search(self, terms, limit):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = SearchResult.from_row
+            if not self.fts_enabled:
+                return self._load_search_like(cursor, terms, limit)
+            
+            # Quote every term so user input can't inject FTS5 syntax, and
+            # treat the last one as a prefix to match partially typed words
+            match = ' '.join(f'"{term}"' for term in terms) + '*'
+            cursor.execute('''
+                SELECT p.id, p.title, p.description, p.image_file_name, p.created_at,
+                       highlight(projects_fts, 0, ?, ?),
+                       snippet(projects_fts, 1, ?, ?, '…', 24)
+                FROM projects_fts
+                JOIN projects p ON p.id = projects_fts.rowid
+                WHERE projects_fts MATCH ?
+                ORDER BY bm25(projects_fts, ?, ?)
+                LIMIT ?
+            ''', (HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END,
+                  match, *self._SEARCH_WEIGHTS, limit))
+            return cursor.fetchall()
+    
+    def _load_search_like(self, cursor, terms, limit):
+        """Unranked LIKE scan used when FTS5 is unavailable"""
+        where = ' AND '.join(['(title LIKE ? OR description LIKE ?)'] * len(terms))
+        params = [f'%{term}%' for term in terms for _ in range(2)]
+        cursor.execute(f'''
+            SELECT {_LISTING_SELECT}, title, description FROM projects
+            WHERE {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (*params, limit))
+        return cursor.fetchall()
+    
+    def get_projects_version(self):
+        """Return (version, last_modified) for the projects table
         
-        conn.close()
-        return project
+        The version increases on every insert, update or delete from any
+        process; last_modified is the newest updated_at, moved to the
+        current time on deletes. Both are cheap enough to check before
+        deciding whether to query and render a listing at all.
+        """
+        return self._cached(('version',), self._load_projects_version)
+    
+    def _load_projects_version(self):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT version, last_modified FROM projects_meta WHERE id = 1')
+            return cursor.fetchone()
     
     def add_project(self, title, description, image_file_name):
         """Add a new project to the database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO projects (title, description, image_file_name)
+                VALUES (?, ?, ?)
+            ''', (title, description, image_file_name))
+            
+            project_id = cursor.lastrowid
+            conn.commit()
         
-        cursor.execute('''
-            INSERT INTO projects (title, description, image_file_name)
-            VALUES (?, ?, ?)
-        ''', (title, description, image_file_name))
+        self._invalidate(project_id)
+        return project_id
+    
+    def bulk_add_projects(self, projects, batch_size=1000):
+        """Insert many projects, one executemany and one commit per batch
         
-        project_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        `projects` may be any iterable (including a generator) of mappings
+        with title, description and image_file_name, and optionally
+        created_at and updated_at; it is consumed one batch at a time.
+        Timestamps are stored in TIMESTAMP_FORMAT, so they sort and page
+        correctly whatever ISO 8601 form they arrive in; a malformed one
+        raises ValueError. Returns the number of projects inserted.
+        """
+        rows = (
+            (project['title'], project['description'], project['image_file_name'],
+             format_timestamp(parse_timestamp(project.get('created_at'))),
+             format_timestamp(parse_timestamp(project.get('updated_at'))))
+            for project in projects
+        )
+        total = 0
+        try:
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                with self.write_connection() as conn:
+                    conn.executemany('''
+                        INSERT INTO projects (title, description, image_file_name, created_at, updated_at)
+                        VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, CURRENT_TIMESTAMP))
+                    ''', batch)
+                    conn.commit()
+                total += len(batch)
+        finally:
+            if total and self.cache is not None:
+                self.cache.clear()
         
-        return project_id
+        return total
     
-    def update_project(self, project_id, title, description, image_file_name):
-        """Update an existing project"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def add_contact_messages(self, messages):
+        """Insert contact form messages in a single transaction
         
-        cursor.execute('''
-            UPDATE projects 
-            SET title = ?, description = ?, image_file_name = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (title, description, image_file_name, project_id))
+        `messages` is a sequence of mappings with first_name, last_name,
+        email and message, and optionally password_hash and created_at.
+        Returns the number of messages inserted.
+        """
+        rows = [
+            (message['first_name'], message['last_name'], message['email'],
+             message['message'], message.get('password_hash'), message.get('created_at') or None)
+            for message in messages
+        ]
+        if not rows:
+            return 0
+        with self.write_connection() as conn:
+            conn.executemany('''
+                INSERT INTO contact_messages (first_name, last_name, email, message, password_hash, created_at)
+                VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+            ''', rows)
+            conn.commit()
+        return len(rows)
+    
+    def get_contact_messages(self, limit=50):
+        """Get the most recent contact messages, newest first"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT * FROM contact_messages ORDER BY id DESC LIMIT ?', (limit,))
+            return cursor.fetchall()
+    
+    def iter_projects(self, batch_size=1000, after_id=0):
+        """Yield every project with an id above `after_id`, in id order
         
-        conn.commit()
-        conn.close()
+        Reads one batch per query, and no connection or read transaction
+        is held between batches, so a long export neither pins the pool
+        nor blocks WAL checkpoints, and memory use doesn't grow with the
+        table.
+        """
+        last_id = after_id
+        while True:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = Project.from_row
+                cursor.execute(f'SELECT {_PROJECT_SELECT} FROM projects WHERE id > ? ORDER BY id LIMIT ?',
+                               (last_id, batch_size))
+                rows = cursor.fetchall()
+            
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1].id
+    
+    def update_project(self, project_id, title, description, image_file_name):
+        """Update an existing project"""
+        with self.write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE projects 
+                SET title = ?, description = ?, image_file_name = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (title, description, image_file_name, project_id))
+            
+            conn.commit()
         
+        self._invalidate(project_id)
         return cursor.rowcount > 0
     
     def delete_project(self, project_id):
         """Delete a project from the database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
-        
-        conn.commit()
-        conn.close()
+        with self.write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+            
+            conn.commit()
         
+        self._invalidate(project_id)
         return cursor.rowcount > 0
     
     def project_exists(self, project_id):
         """Check if a project exists by ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM projects WHERE id = ?', (project_id,))
-        count = cursor.fetchone()[0]
+        return self._cached(('exists', project_id),
+                            lambda: self._count_project(project_id) > 0)
+    
+    def _count_project(self, project_id):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM projects WHERE id = ?', (project_id,))
+            return cursor.fetchone()[0]
+
+
+class AsyncDatabaseManager:
+    """Awaitable read methods of a DatabaseManager, run on a dedicated executor
+    
+    The executor has one thread per pooled connection, so calls never
+    wait inside it for a connection, and the event loop never blocks
+    on SQLite. Results and caching are exactly those of the wrapped
+    manager.
+    """
+    
+    def __init__(self, db_manager, max_workers=None):
+        """Wrap `db_manager`; `max_workers` defaults to its pool size"""
+        self.db = db_manager
+        self.max_workers = max_workers or db_manager.pool.size
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    async def _run(self, method, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='dal')
+            executor = self._executor
+        return await asyncio.get_running_loop().run_in_executor(executor, method, *args)
+    
+    async def get_all_projects(self):
+        """Retrieve all projects from the database"""
+        return await self._run(self.db.get_all_projects)
+    
+    async def get_projects_page(self, after=None, before=None, limit=20):
+        """Retrieve one page of projects, newest first, with its neighbouring cursors"""
+        return await self._run(self.db.get_projects_page, after, before, limit)
+    
+    async def get_project_by_id(self, project_id):
+        """Retrieve a specific project by ID"""
+        return await self._run(self.db.get_project_by_id, project_id)
+    
+    async def project_exists(self, project_id):
+        """Check if a project exists by ID"""
+        return await self._run(self.db.project_exists, project_id)
+    
+    async def search_projects(self, query, limit=20):
+        """Full-text search over project titles and descriptions, best match first"""
+        return await self._run(self.db.search_projects, query, limit)
+    
+    async def get_projects_version(self):
+        """Return (version, last_modified) for the projects table"""
+        return await self._run(self.db.get_projects_version)
+    
+    async def prefetch(self, method, *args):
+        """Run a read method of the wrapped manager and return what it looked up
         
-        conn.close()
-        return count > 0
+        The result maps each lookup the call made to its value, whether
+        it came from the cache or the database, for passing to
+        DatabaseManager.serving().
+        """
+        def record():
+            with self.db.recording() as results:
+                method(*args)
+            return results
+        return await self._run(record)
+    
+    def close(self):
+        """Stop the executor threads; the wrapped manager stays open"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+    
+    def after_fork(self):
+        """Drop the executor inherited from the parent process"""
+        self._executor = None
+        self._lock = threading.Lock()
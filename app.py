@@ -1,36 +1,255 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import (Flask, Response, render_template, request, redirect, url_for, flash, abort,
+                   jsonify)
+import json
+import hashlib
 import os
-from DAL import DatabaseManager
+from datetime import datetime, timezone
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup, escape
+from DAL import (DatabaseManager, HIGHLIGHT_START, HIGHLIGHT_END, LISTING_COLUMNS,
+                 PROJECT_COLUMNS)
+from cli import compile_templates, register_commands
+from http_cache import ResponseCache, conditional, fingerprint_directory
+from assets import AssetManifest, CRITICAL_NAME, MANIFEST_NAME, OUTPUT_DIR
+from images import ImagePipeline, DERIVED_DIR
+from metrics import Metrics
+from write_queue import BatchWriter
+from passwords import DEFAULT_METHOD, HashingUnavailable, PasswordHasher
+from ratelimit import RateLimiter, backend_from_env
+from sqltrace import QueryTracer
 
-app = Flask(__name__)
+# Static files are served by serve_static below rather than Flask's default view
+app = Flask(__name__, static_folder=None)
+app.static_folder = 'static'
 app.secret_key = 'your-secret-key-here'  # Change this in production
+app.config['PROJECTS_PER_PAGE'] = 20
+app.config['SEARCH_RESULTS_LIMIT'] = 20
+app.config['API_MAX_PAGE_SIZE'] = 100
+app.config['API_STREAM_BATCH_SIZE'] = 1000
+app.config['PAGE_CACHE_PRERENDER'] = os.environ.get('PAGE_CACHE_PRERENDER') == '1'
+# Pages link fingerprinted assets, so the asset build is part of the build too
+app.config['BUILD_ID'], app.config['BUILD_TIME'] = fingerprint_directory(
+    os.path.join(app.root_path, app.template_folder),
+    [os.path.join(app.root_path, app.static_folder, OUTPUT_DIR, name) for name in (MANIFEST_NAME, CRITICAL_NAME)])
 
-# Initialize database manager
-db_manager = DatabaseManager()
+# Compiled templates are kept on disk, keyed by source checksum, so a new
+# process loads bytecode instead of parsing every template again;
+# `flask templates compile` fills the cache ahead of time
+if os.environ.get('JINJA_CACHE_DIR'):
+    os.makedirs(os.environ['JINJA_CACHE_DIR'], exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(os.environ.get('JINJA_CACHE_DIR') or None)
+
+# Opt-in SQL tracing: SQL_TRACE=1 logs statements slower than SQL_SLOW_MS
+# with their query plans, and requests running more than SQL_QUERY_BUDGET
+sql_tracer = QueryTracer(
+    app, slow_ms=float(os.environ.get('SQL_SLOW_MS', 50)),
+    budget=int(os.environ.get('SQL_QUERY_BUDGET', 10))) if os.environ.get('SQL_TRACE') == '1' else None
+
+# Initialize database manager; the database is opened and its schema
+# checked on first use rather than at import
+db_manager = DatabaseManager(os.environ.get('PROJECTS_DB', 'projects.db'), tracer=sql_tracer)
+
+# Register `flask projects import/export`
+register_commands(app, db_manager)
+
+# Per-endpoint latency, status and in-flight metrics, with DB vs template time
+metrics = Metrics(app)
+metrics.instrument(db_manager, (
+    'get_all_projects', 'get_projects_page', 'get_project_by_id', 'project_exists',
+    'search_projects', 'get_projects_version', 'add_project', 'bulk_add_projects',
+    'update_project', 'delete_project', 'add_contact_messages',
+))
+
+# Contact messages are written in batches off the request thread; a full
+# queue turns submissions away rather than stalling page serving
+contact_writer = BatchWriter(db_manager.add_contact_messages,
+                             max_queue=int(os.environ.get('CONTACT_QUEUE_SIZE', 1000)),
+                             batch_size=100, max_delay=0.05)
+
+# Contact passwords are hashed on a thread of their own (per process), so a
+# burst of form posts can't take every CPU away from page requests
+password_hasher = PasswordHasher(
+    method=os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 1)),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 4)),
+    timeout=float(os.environ.get('PASSWORD_HASH_TIMEOUT', 2.0)))
+
+# Token buckets on the write endpoints; RATE_LIMIT_DB shares them between
+# worker processes, and RATE_LIMITS overrides the limits per endpoint
+limiter = RateLimiter(backend_from_env(), app)
+
+# Resolve static URLs to fingerprinted, precompressed files from `flask assets build`
+assets = AssetManifest(app, immutable_prefixes=(DERIVED_DIR + '/',))
+
+# Resized WebP/AVIF copies of project images, built in the background
+image_pipeline = ImagePipeline(os.path.join(app.static_folder, 'images'),
+                               os.path.join(app.static_folder, DERIVED_DIR))
+
+@app.template_global()
+def image_variants(filename):
+    """Derivatives of a static/images file for a <picture>, or None if not built yet"""
+    return image_pipeline.variants(
+        filename, lambda name: url_for('static', filename=f'{DERIVED_DIR}/{name}'))
+
+# Cache for pages whose output only changes between deploys
+page_cache = ResponseCache(app)
+
+@metrics.add_collector
+def cache_metrics():
+    """Page and query cache counters for /metrics"""
+    page = page_cache.stats()
+    collected = [
+        ('page_cache_hits_total', 'counter', 'Pages served from the page cache.', page['hits']),
+        ('page_cache_misses_total', 'counter', 'Pages rendered and stored.', page['misses']),
+        ('page_cache_bypasses_total', 'counter', 'Requests not eligible for the page cache.', page['bypasses']),
+        ('page_cache_bytes', 'gauge', 'Bytes held by the page cache.', page['bytes']),
+    ]
+    if db_manager.cache is not None:
+        collected += [
+            ('query_cache_hits_total', 'counter', 'DatabaseManager reads served from cache.', db_manager.cache.hits),
+            ('query_cache_misses_total', 'counter', 'DatabaseManager reads that queried SQLite.', db_manager.cache.misses),
+        ]
+    collected += [
+        ('contact_queue_pending', 'gauge', 'Contact messages waiting to be written.', contact_writer.pending()),
+        ('contact_messages_written_total', 'counter', 'Contact messages written by the batch writer.', contact_writer.written),
+        ('contact_messages_failed_total', 'counter', 'Contact messages lost to failed batch writes.', contact_writer.failed),
+        ('contact_messages_rejected_total', 'counter', 'Contact messages turned away by a full queue.', contact_writer.rejected),
+        ('password_hashes_in_flight', 'gauge', 'Password hashes queued or running.', password_hasher.in_flight()),
+        ('password_hashes_total', 'counter', 'Password hashes computed.', password_hasher.hashed),
+        ('password_hashes_rejected_total', 'counter', 'Password hashes refused because the pool was full.', password_hasher.rejected),
+        ('password_hashes_timed_out_total', 'counter', 'Password hashes that exceeded the timeout.', password_hasher.timed_out),
+        ('rate_limited_requests_total', 'counter', 'Requests answered 429 by the rate limiter.', limiter.rejected),
+    ]
+    if sql_tracer is not None:
+        collected += [
+            ('sql_statements_total', 'counter', 'SQL statements traced.', sql_tracer.queries),
+            ('sql_slow_statements_total', 'counter', 'Traced statements over SQL_SLOW_MS.', sql_tracer.slow_queries),
+            ('sql_requests_over_budget_total', 'counter', 'Requests that ran more than SQL_QUERY_BUDGET statements.', sql_tracer.over_budget),
+        ]
+    return collected
+
+@app.template_filter('highlight')
+def highlight(text):
+    """Escape search result text and mark up the matched terms"""
+    marked = str(escape(text)).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return Markup(marked)
+
+def projects_validators():
+    """ETag and Last-Modified for project listings, from the projects table version"""
+    version, last_modified = db_manager.get_projects_version()
+    tag = (f"{app.config['BUILD_ID']}:{version}:{image_pipeline.state()}:"
+           f"{app.config['PROJECTS_PER_PAGE']}:{request.full_path}")
+    etag = hashlib.sha256(tag.encode('utf-8')).hexdigest()[:32]
+    
+    modified = app.config['BUILD_TIME']
+    if last_modified:
+        try:
+            data_modified = datetime.fromisoformat(last_modified).replace(tzinfo=timezone.utc)
+            modified = max(modified, data_modified)
+        except ValueError:
+            pass
+    return etag, modified
 
 @app.route('/')
+@page_cache.cached
 def home():
     """Home page route"""
     return render_template('index.html')
 
 @app.route('/about')
+@page_cache.cached
 def about():
     """About page route"""
     return render_template('about.html')
 
 @app.route('/resume')
+@page_cache.cached
 def resume():
     """Resume page route"""
     return render_template('resume.html')
 
 @app.route('/projects')
+@conditional(projects_validators)
 def projects():
     """Projects page route"""
-    # Get all projects from database
-    projects_data = db_manager.get_all_projects()
-    return render_template('projects.html', projects=projects_data)
+    # Get one page of projects from database
+    try:
+        projects_data, next_cursor, prev_cursor = db_manager.get_projects_page(
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            limit=app.config['PROJECTS_PER_PAGE'])
+    except ValueError:
+        abort(400)
+    return render_template('projects.html', projects=projects_data,
+                           next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+@app.route('/projects/search')
+@conditional(projects_validators)
+def search_projects():
+    """Project search results route"""
+    query = request.args.get('q', '').strip()
+    results = db_manager.search_projects(query, limit=app.config['SEARCH_RESULTS_LIMIT']) if query else []
+    return render_template('search.html', query=query, results=results)
+
+def api_error(message, status=400):
+    """JSON error response for the API routes"""
+    return jsonify(error=message), status
+
+def requested_fields(allowed):
+    """Fields named by ?fields=a,b (all of `allowed` by default); None if any is unknown"""
+    names = request.args.get('fields')
+    if not names:
+        return allowed
+    fields = tuple(name.strip() for name in names.split(',') if name.strip())
+    if not fields or any(name not in allowed for name in fields):
+        return None
+    return fields
+
+@app.route('/api/projects')
+@conditional(projects_validators)
+def api_projects():
+    """One page of projects as JSON, newest first, with cursors for the next and previous pages"""
+    fields = requested_fields(LISTING_COLUMNS)
+    if fields is None:
+        return api_error(f"fields must be a comma-separated subset of {', '.join(LISTING_COLUMNS)}")
+    limit = request.args.get('limit', app.config['PROJECTS_PER_PAGE'], type=int)
+    if not 1 <= limit <= app.config['API_MAX_PAGE_SIZE']:
+        return api_error(f"limit must be between 1 and {app.config['API_MAX_PAGE_SIZE']}")
+    try:
+        projects_data, next_cursor, prev_cursor = db_manager.get_projects_page(
+            after=request.args.get('after'), before=request.args.get('before'), limit=limit)
+    except ValueError:
+        return api_error('Invalid page cursor')
+    return jsonify(projects=[project.to_dict(fields) for project in projects_data],
+                   next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+@app.route('/api/projects.ndjson')
+@conditional(projects_validators)
+def api_projects_ndjson():
+    """Every project as newline-delimited JSON in id order, streamed in batches
+    
+    Pass ?after_id= with the last id received to resume an interrupted sync.
+    """
+    fields = requested_fields(PROJECT_COLUMNS)
+    if fields is None:
+        return api_error(f"fields must be a comma-separated subset of {', '.join(PROJECT_COLUMNS)}")
+    after_id = request.args.get('after_id', 0, type=int)
+    batch_size = app.config['API_STREAM_BATCH_SIZE']
+    
+    def generate():
+        lines = []
+        for project in db_manager.iter_projects(batch_size, after_id=after_id):
+            lines.append(json.dumps(project.to_dict(fields), ensure_ascii=False))
+            if len(lines) == batch_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
 
 @app.route('/contact', methods=['GET', 'POST'])
+@limiter.limit(per_client='10/minute', overall='300/minute')
 def contact():
     """Contact page route with form handling"""
     if request.method == 'POST':
@@ -65,14 +284,31 @@ def contact():
             for error in errors:
                 flash(error, 'error')
             return render_template('contact.html')
-        else:
-            # Form is valid, redirect to thank you page
-            flash('Thank you for your message!', 'success')
-            return redirect(url_for('thank_you'))
+        
+        try:
+            password_hash = password_hasher.hash(password)
+        except HashingUnavailable:
+            password_hash = None
+        
+        queued = password_hash is not None and contact_writer.submit({
+            'first_name': first_name,
+            'last_name': last_name,
+            'email': email,
+            'message': message,
+            'password_hash': password_hash,
+        })
+        if not queued:
+            flash('We are receiving a lot of messages right now. Please try again in a minute.', 'error')
+            return render_template('contact.html'), 503, {'Retry-After': '60'}
+        
+        # Form is valid, redirect to thank you page
+        flash('Thank you for your message!', 'success')
+        return redirect(url_for('thank_you'))
     
     return render_template('contact.html')
 
 @app.route('/add_project', methods=['GET', 'POST'])
+@limiter.limit(per_client='20/minute', overall='120/minute')
 def add_project():
     """Add new project page route"""
     if request.method == 'POST':
@@ -102,6 +338,7 @@ def add_project():
             # Add project to database
             try:
                 project_id = db_manager.add_project(title, description, image_file_name)
+                image_pipeline.submit(image_file_name)
                 flash(f'Project "{title}" added successfully!', 'success')
                 return redirect(url_for('projects'))
             except Exception as e:
@@ -111,14 +348,39 @@ def add_project():
     return render_template('add_project.html')
 
 @app.route('/thankyou')
+@page_cache.cached
 def thank_you():
     """Thank you page route"""
     return render_template('thankyou.html')
 
-@app.route('/static/<path:filename>')
+@app.route('/static/<path:filename>', endpoint='static')
 def serve_static(filename):
     """Serve static files"""
-    return app.send_static_file(filename)
+    return assets.send(filename)
+
+if app.config['PAGE_CACHE_PRERENDER']:
+    page_cache.prerender(app, ['/', '/about', '/resume', '/thankyou'])
+
+def warm_up():
+    """Check the schema and compile templates once, before any workers fork"""
+    db_manager.ensure_schema()
+    compile_templates(app.jinja_env)
+
+def before_fork():
+    """Release connections and worker threads so forked processes start clean"""
+    image_pipeline.shutdown(wait=True)
+    password_hasher.shutdown()
+    contact_writer.close()
+    limiter.backend.close()
+    db_manager.close()
+
+def after_fork():
+    """Give a forked worker its own database connections, locks and executor"""
+    db_manager.after_fork()
+    image_pipeline.after_fork()
+    contact_writer.after_fork()
+    password_hasher.after_fork()
+    limiter.after_fork()
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,222 @@
+"""ASGI entry point, for serving with e.g. `uvicorn asgi:application`
+
+The Flask app, its templates and its behaviour are unchanged. Connections
+are held by the event loop instead of one thread each, and requests run
+in one of two ways:
+
+* Page and project listing routes run on the event loop. Any lookups
+  they need are awaited first on AsyncDatabaseManager's executor, and
+  their results are handed to the view's own DAL calls, so those never
+  touch the database from the loop. If prefetching fails (a bad cursor,
+  a database error) the route runs threaded instead.
+* Every other route (form posts, static files, /metrics) runs on a thread
+  pool, exactly as it would under a threaded WSGI server.
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from urllib.parse import parse_qsl
+
+from app import app, contact_writer, db_manager, warm_up
+from DAL import AsyncDatabaseManager
+
+INLINE_PAGES = ('/', '/about', '/resume', '/thankyou')
+
+
+def _query_arg(scope, name):
+    for key, value in parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True):
+        if key == name:
+            return value
+    return None
+
+
+async def _prefetch_projects(async_db, scope):
+    return await asyncio.gather(
+        async_db.prefetch(db_manager.get_projects_version),
+        async_db.prefetch(db_manager.get_projects_page, _query_arg(scope, 'after'),
+                          _query_arg(scope, 'before'), app.config['PROJECTS_PER_PAGE']))
+
+
+async def _prefetch_search(async_db, scope):
+    query = (_query_arg(scope, 'q') or '').strip()
+    lookups = [async_db.prefetch(db_manager.get_projects_version)]
+    if query:
+        lookups.append(async_db.prefetch(db_manager.search_projects, query,
+                                         app.config['SEARCH_RESULTS_LIMIT']))
+    return await asyncio.gather(*lookups)
+
+
+# Routes whose lookups can be awaited ahead of running the view; each
+# must make exactly the DAL calls its view will
+PREFETCHERS = {
+    '/projects': _prefetch_projects,
+    '/projects/search': _prefetch_search,
+}
+
+
+def wsgi_environ(scope, body):
+    """Build a PEP 3333 environ for an ASGI HTTP scope"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'CONTENT_LENGTH': str(len(body)),
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class FlaskASGI:
+    """Serves a Flask app over ASGI, running cheap routes on the event loop"""
+
+    def __init__(self, flask_app, async_db, max_threads=32):
+        self.app = flask_app
+        self.async_db = async_db
+        self.max_threads = max_threads
+        self._executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await asyncio.get_running_loop().run_in_executor(None, warm_up)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.close)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        environ = wsgi_environ(scope, bytes(body))
+
+        if scope['method'] in ('GET', 'HEAD'):
+            prefetch = PREFETCHERS.get(scope['path'])
+            if prefetch is not None:
+                try:
+                    lookups = await prefetch(self.async_db, scope)
+                except Exception:
+                    # Let the view meet the error (including a bad cursor's
+                    # 400) where it is handled and logged as usual
+                    lookups = None
+                if lookups is not None:
+                    results = {key: value for looked_up in lookups for key, value in looked_up.items()}
+                    await self._run_inline(environ, send, results)
+                    return
+            elif scope['path'] in INLINE_PAGES:
+                await self._run_inline(environ, send)
+                return
+        await self._run_threaded(environ, send)
+
+    @staticmethod
+    def _call_wsgi(flask_app, environ):
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+
+        body = flask_app(environ, start_response)
+        return started, body
+
+    @staticmethod
+    def _start_message(started):
+        status, headers = started
+        return {
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in headers],
+        }
+
+    async def _run_inline(self, environ, send, results=None):
+        # The whole body is produced before the first await, so the
+        # prefetched results can't be served to another request
+        with db_manager.serving(results) if results is not None else nullcontext():
+            started, body = self._call_wsgi(self.app, environ)
+            try:
+                chunks = b''.join(body)
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+        await send(self._start_message(started))
+        await send({'type': 'http.response.body', 'body': chunks})
+
+    async def _run_threaded(self, environ, send):
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def respond():
+            started, body = self._call_wsgi(self.app, environ)
+            try:
+                sent_start = False
+                for chunk in body:
+                    if not chunk:
+                        continue
+                    if not sent_start:
+                        send_from_thread(self._start_message(started))
+                        sent_start = True
+                    send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                if not sent_start:
+                    send_from_thread(self._start_message(started))
+                send_from_thread({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_threads, thread_name_prefix='wsgi')
+        await loop.run_in_executor(self._executor, respond)
+
+    def close(self):
+        """Stop the thread pools and write out queued contact messages"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.async_db.close()
+        contact_writer.close()
+
+
+application = FlaskASGI(app, AsyncDatabaseManager(db_manager),
+                        max_threads=int(os.environ.get('ASGI_THREADS', 32)))
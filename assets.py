@@ -0,0 +1,173 @@
+"""Fingerprinted, precompressed static asset pipeline"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import current_app, request, send_from_directory, url_for
+from markupsafe import Markup
+
+from critical_css import minify_css
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip variants are still built
+    brotli = None
+
+# Build output lives inside the static folder so it is served from /static
+OUTPUT_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+CRITICAL_NAME = 'critical.json'
+
+# Text formats worth precompressing; images and PDFs are already compressed
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml')
+
+# Encodings in order of preference, with the suffix of their precompressed file
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def build_assets(static_folder, skip_dirs=()):
+    """Copy every static file to a content-hashed name, with gzip/brotli variants
+    
+    Stylesheets are minified on the way. Writes OUTPUT_DIR/MANIFEST_NAME mapping each original path (relative
+    to `static_folder`, with forward slashes) to its fingerprinted path.
+    Returns the manifest.
+    """
+    output_root = os.path.join(static_folder, OUTPUT_DIR)
+    if os.path.isdir(output_root):
+        shutil.rmtree(output_root)
+    
+    skipped = {OUTPUT_DIR, *skip_dirs}
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [d for d in dirs if d not in skipped]
+        dirs.sort()
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            manifest[logical] = _fingerprint(source, logical, output_root)
+    
+    with open(os.path.join(output_root, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def _fingerprint(source, logical, output_root):
+    """Write one hashed copy (and compressed variants) and return its static path"""
+    with open(source, 'rb') as f:
+        data = f.read()
+    
+    stem, extension = os.path.splitext(logical)
+    if extension.lower() == '.css':
+        data = minify_css(data.decode('utf-8')).encode('utf-8')
+    hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+    target = os.path.join(output_root, *hashed.split('/'))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+    
+    if extension.lower() in COMPRESSIBLE_EXTENSIONS:
+        # mtime=0 keeps gzip output byte-identical between builds
+        variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(data, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(data):
+                with open(target + suffix, 'wb') as f:
+                    f.write(compressed)
+    
+    return f'{OUTPUT_DIR}/{hashed}'
+
+
+class AssetManifest:
+    """Resolves url_for('static', ...) to fingerprinted files and serves them"""
+    
+    def __init__(self, app=None, immutable_prefixes=()):
+        """`immutable_prefixes` are static subpaths whose names are already content-hashed"""
+        self.manifest = {}
+        self.fingerprinted = frozenset()
+        self.critical = {}
+        self.immutable_prefixes = tuple(immutable_prefixes)
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Load the build manifest, if any, and rewrite static URLs through it"""
+        self.load(os.path.join(app.static_folder, OUTPUT_DIR, MANIFEST_NAME))
+        app.url_defaults(self._rewrite_static_url)
+        app.add_template_global(self.critical_css)
+        app.add_template_global(self.stylesheet)
+        app.extensions['assets'] = self
+    
+    def load(self, path):
+        """Read a manifest written by build_assets, and the critical CSS beside it
+        
+        A missing file means no build.
+        """
+        self.manifest = _read_json(path)
+        self.fingerprinted = frozenset(self.manifest.values())
+        self.critical = _read_json(os.path.join(os.path.dirname(path), CRITICAL_NAME))
+    
+    def critical_css(self):
+        """An inline <style> with the current page's above-the-fold rules, if extracted"""
+        css = self.critical.get(request.endpoint)
+        if not css:
+            return Markup('')
+        # Escaped so a '</style>' inside a CSS string can't end the element
+        return Markup('<style>{}</style>').format(Markup(css.replace('</', '<\\/')))
+    
+    def stylesheet(self, filename):
+        """A <link> for a static stylesheet, loaded without blocking when critical CSS is inlined
+        
+        Pages with no extracted critical CSS get an ordinary blocking link.
+        Otherwise the sheet is preloaded and switched to a stylesheet once
+        it arrives; sheets apply in document order whenever they load.
+        """
+        href = url_for('static', filename=filename)
+        if not self.critical.get(request.endpoint):
+            return Markup('<link rel="stylesheet" href="{}">').format(href)
+        return Markup('<link rel="preload" href="{0}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+                      '<noscript><link rel="stylesheet" href="{0}"></noscript>').format(href)
+    
+    def _rewrite_static_url(self, endpoint, values):
+        if endpoint == 'static':
+            filename = values.get('filename')
+            if filename in self.manifest:
+                values['filename'] = self.manifest[filename]
+    
+    def send(self, filename):
+        """Serve a static file, using the best precompressed variant for fingerprinted files"""
+        if filename not in self.fingerprinted and not filename.startswith(self.immutable_prefixes):
+            return current_app.send_static_file(filename)
+        
+        static_folder = current_app.static_folder
+        response = None
+        for encoding, suffix in ENCODINGS:
+            if request.accept_encodings[encoding] and os.path.isfile(
+                    os.path.join(static_folder, filename + suffix)):
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                response = send_from_directory(static_folder, filename + suffix,
+                                               mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = send_from_directory(static_folder, filename, max_age=IMMUTABLE_MAX_AGE)
+        
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
@@ -0,0 +1,77 @@
+"""Sync (gunicorn gthread) vs ASGI (uvicorn) serving at high concurrency.
+
+For each stack and concurrency level, one process serves a scratch copy
+of projects.db while a number of idle keep-alive connections are held
+open, and reports requests/sec, errors and tail latency.
+
+Usage: python benchmarks/bench_asgi.py [--concurrency 16,128,512] [--idle 500]
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from loadgen import REPO_ROOT, local_server, run_load
+
+STACKS = {
+    'sync-gthread': [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', '127.0.0.1:{port}',
+                     '--workers', '1', '--threads', '8'],
+    'asgi-uvicorn': [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', '{port}',
+                     '--no-access-log'],
+}
+
+
+@contextmanager
+def idle_connections(base_url, count):
+    """Hold `count` keep-alive connections that made one request and went quiet"""
+    target = urlsplit(base_url)
+    held = []
+    try:
+        for _ in range(count):
+            conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+            try:
+                conn.request('GET', '/about')
+                conn.getresponse().read()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                break
+            held.append(conn)
+        yield len(held)
+    finally:
+        for conn in held:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stacks', default=','.join(STACKS))
+    parser.add_argument('--path', default='/projects')
+    parser.add_argument('--concurrency', default='16,128,512')
+    parser.add_argument('--idle', type=int, default=500, help='Idle keep-alive connections to hold open.')
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+    
+    results = []
+    for stack in args.stacks.split(','):
+        for concurrency in (int(level) for level in args.concurrency.split(',')):
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = os.path.join(tmp, 'projects.db')
+                shutil.copyfile(os.path.join(REPO_ROOT, 'projects.db'), db_path)
+                env = {'PROJECTS_DB': db_path, 'GUNICORN_ACCESS_LOG': ''}
+                with local_server(env=env, command=STACKS[stack]) as base_url:
+                    with idle_connections(base_url, args.idle) as idle:
+                        run = run_load(base_url, args.path, concurrency=concurrency,
+                                       duration=args.duration)
+            results.append({'stack': stack, 'concurrency': concurrency, 'idle_connections': idle,
+                            'rps': run['rps'], 'errors': run['errors'], 'latency_ms': run['latency_ms']})
+    
+    print(json.dumps({'path': args.path, 'cpus': os.cpu_count(), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""GET latency while /contact is flooded with POSTs that each hash a password.
+
+Runs the same measurement with the hashing pool capped (the default
+settings) and effectively uncapped, each against a scratch database:
+first GETs alone, then GETs alongside the POST flood.
+
+Usage: python benchmarks/bench_contact_flood.py [--get-path /projects] [--duration 5]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from urllib.parse import urlencode
+
+from loadgen import REPO_ROOT, local_server, run_load
+
+CONTACT_FORM = urlencode({
+    'firstName': 'Flood', 'lastName': 'Test', 'email': 'flood@example.com',
+    'password': 'password123', 'confirmPassword': 'password123',
+    'message': 'Sent by the contact flood benchmark',
+})
+
+SETUPS = {
+    'capped': {},
+    'uncapped': {'PASSWORD_HASH_WORKERS': '64', 'PASSWORD_HASH_MAX_PENDING': '256',
+                 'PASSWORD_HASH_TIMEOUT': '60'},
+}
+
+
+def flood_while(base_url, args, measure):
+    """Run `measure()` while another thread POSTs to /contact"""
+    flood = {}
+    
+    def post():
+        flood.update(run_load(base_url, '/contact', method='POST', body=CONTACT_FORM,
+                              concurrency=args.post_concurrency, duration=args.duration + 1, warmup=0))
+    
+    thread = threading.Thread(target=post)
+    thread.start()
+    try:
+        return measure(), flood
+    finally:
+        thread.join()
+
+
+def run_setup(env, args):
+    command = args.server_command.split() if args.server_command else None
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'projects.db')
+        shutil.copyfile(os.path.join(REPO_ROOT, 'projects.db'), db_path)
+        with local_server(env={'PROJECTS_DB': db_path, **env}, command=command) as base_url:
+            
+            def measure():
+                return run_load(base_url, args.get_path, concurrency=args.get_concurrency,
+                                duration=args.duration)
+            
+            idle = measure()
+            loaded, flood = flood_while(base_url, args, measure)
+    return {
+        'get_idle_ms': idle['latency_ms'],
+        'get_under_flood_ms': loaded['latency_ms'],
+        'get_rps': {'idle': idle['rps'], 'under_flood': loaded['rps']},
+        'post_rps': flood.get('rps'),
+        'post_statuses': flood.get('statuses'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--get-path', default='/projects')
+    parser.add_argument('--get-concurrency', type=int, default=4)
+    parser.add_argument('--post-concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--server-command', help="Serve with this command instead; '{port}' is substituted.")
+    args = parser.parse_args()
+    
+    results = {name: run_setup(env, args) for name, env in SETUPS.items()}
+    print(json.dumps({'get_path': args.get_path, 'cpus': os.cpu_count(), 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
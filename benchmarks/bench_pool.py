@@ -0,0 +1,138 @@
+"""Read throughput under concurrent updates: per-call connections vs. the pool.
+
+Usage: python benchmarks/bench_pool.py [--seconds 5] [--readers 8] [--writers 2]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DAL import DatabaseManager
+
+
+class LegacyDatabaseManager:
+    """The pre-pool access pattern: a fresh rollback-journal connection per call"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS projects (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                image_file_name TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def get_all_projects(self):
+        conn = sqlite3.connect(self.db_path)
+        projects = conn.execute('SELECT * FROM projects ORDER BY created_at DESC').fetchall()
+        conn.close()
+        return projects
+
+    def add_project(self, title, description, image_file_name):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute(
+            'INSERT INTO projects (title, description, image_file_name) VALUES (?, ?, ?)',
+            (title, description, image_file_name))
+        conn.commit()
+        conn.close()
+        return cursor.lastrowid
+
+    def update_project(self, project_id, title, description, image_file_name):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute(
+            'UPDATE projects SET title = ?, description = ?, image_file_name = ?, '
+            'updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+            (title, description, image_file_name, project_id))
+        conn.commit()
+        conn.close()
+        return cursor.rowcount > 0
+
+    def close(self):
+        pass
+
+
+def run(manager, seconds, readers, writers, seed_rows):
+    """Hammer `manager` with reader and writer threads and count completed calls"""
+    for i in range(seed_rows):
+        manager.add_project(f'Seed {i}', 'Seeded description for benchmarking', 'seed.png')
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def reader():
+        done = errors = 0
+        while not stop.is_set():
+            try:
+                manager.get_all_projects()
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        with lock:
+            counts['reads'] += done
+            counts['errors'] += errors
+
+    def writer():
+        done = errors = 0
+        while not stop.is_set():
+            try:
+                project_id = done % seed_rows + 1
+                manager.update_project(project_id, f'Bench {done}', 'Updated during the benchmark', 'bench.png')
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        with lock:
+            counts['writes'] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    manager.close()
+
+    return {
+        'reads_per_sec': round(counts['reads'] / seconds, 1),
+        'writes_per_sec': round(counts['writes'] / seconds, 1),
+        'errors': counts['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seed-rows', type=int, default=50)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        before = LegacyDatabaseManager(os.path.join(tmp, 'before.db'))
+        results['before'] = run(before, args.seconds, args.readers, args.writers, args.seed_rows)
+        after = DatabaseManager(os.path.join(tmp, 'after.db'), pool_size=args.readers + args.writers,
+                                cache_ttl=0)
+        results['after'] = run(after, args.seconds, args.readers, args.writers, args.seed_rows)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
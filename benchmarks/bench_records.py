@@ -0,0 +1,62 @@
+"""Memory and load time of project listings: raw tuples vs Project vs ProjectColumns.
+
+Usage: python benchmarks/bench_records.py [--rows 100000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DAL import DatabaseManager
+from bench_suite import synthetic_projects
+
+
+def measure(load):
+    """Peak-free retained size of what `load()` returns, and how long it took"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return retained, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'records.db'), cache_ttl=0)
+        manager.bulk_add_projects(synthetic_projects(args.rows), batch_size=10_000)
+        
+        def raw_tuples():
+            with manager.connection() as conn:
+                return conn.execute('SELECT * FROM projects ORDER BY created_at DESC, id DESC').fetchall()
+        
+        loaders = {
+            'raw_tuples_select_star': raw_tuples,
+            'project_records': manager.get_all_projects,
+            'project_columns': manager.get_project_columns,
+        }
+        results = {}
+        for name, load in loaders.items():
+            retained, elapsed = measure(load)
+            results[name] = {'bytes': retained, 'bytes_per_row': round(retained / args.rows, 1),
+                             'load_seconds': round(elapsed, 3)}
+        manager.close()
+    
+    print(json.dumps({'rows': args.rows, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""FTS5 search latency vs. a LIKE scan over a large projects table.
+
+Usage: python benchmarks/bench_search.py [--rows 100000] [--repeat 50]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DAL import DatabaseManager
+
+VOCABULARY_SIZE = 20_000
+
+
+def make_vocabulary(size, rng):
+    """Pseudo-words with Zipf-like weights, so some terms are common and most are rare"""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = [''.join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(size)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(size)))
+    return words, cum_weights
+
+
+def seed(manager, rows):
+    rng = random.Random(0)
+    words, cum_weights = make_vocabulary(VOCABULARY_SIZE, rng)
+    data = (
+        (' '.join(rng.choices(words, cum_weights=cum_weights, k=3)).title(),
+         ' '.join(rng.choices(words, cum_weights=cum_weights, k=40)), 'seed.png')
+        for _ in range(rows)
+    )
+    with manager.write_connection() as conn:
+        conn.executemany(
+            'INSERT INTO projects (title, description, image_file_name) VALUES (?, ?, ?)', data)
+        conn.commit()
+    return words
+
+
+def time_ms(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return round((time.perf_counter() - start) * 1000 / repeat, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--query', help='defaults to a rare word from the seeded data')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(os.path.join(tmp, 'search.db'), cache_ttl=0)
+        words = seed(manager, args.rows)
+        # A word from the long tail: present, but in few rows, like a real search term
+        query = args.query or words[VOCABULARY_SIZE // 4]
+        terms = query.split()
+
+        fts_ms = time_ms(lambda: manager.search_projects(query), args.repeat)
+        with manager.connection() as conn:
+            like_ms = time_ms(lambda: manager._load_search_like(conn.cursor(), terms, 20), args.repeat)
+        manager.close()
+
+    print(json.dumps({'rows': args.rows, 'query': query,
+                      'fts5_ms': fts_ms, 'like_scan_ms': like_ms}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
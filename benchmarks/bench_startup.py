@@ -0,0 +1,114 @@
+"""Cold-start cost: import time and time to first response.
+
+Each run is a fresh interpreter, so nothing is shared between runs but
+the files on disk. Runs are repeated with an empty and a filled Jinja
+bytecode cache, against a scratch copy of projects.db whose schema
+version is reset first so the first run also pays for the schema check.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--paths /,/projects] [--server]
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from loadgen import REPO_ROOT, free_port
+
+# Imports the app and requests each path once in-process, printing timings as JSON
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+first = {}
+for path in sys.argv[1:]:
+    began = time.perf_counter()
+    status = client.get(path).status_code
+    first[path] = {'ms': (time.perf_counter() - began) * 1000, 'status': status}
+print(json.dumps({'import_ms': (imported - start) * 1000, 'first_request': first}))
+'''
+
+
+def probe(paths, env):
+    output = subprocess.run([sys.executable, '-c', PROBE, *paths], cwd=REPO_ROOT, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def time_to_first_response(command, path, env, timeout=30.0):
+    """Seconds from starting a server process to its first 200 for `path`"""
+    port = free_port()
+    argv = [arg.replace('{port}', str(port)) for arg in command]
+    started = time.perf_counter()
+    process = subprocess.Popen(argv, cwd=REPO_ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                conn.request('GET', path)
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f'No 200 from {path} within {timeout}s')
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def summarize(runs, paths):
+    return {
+        'import_ms': round(statistics.median(run['import_ms'] for run in runs), 1),
+        'first_request_ms': {path: round(statistics.median(run['first_request'][path]['ms'] for run in runs), 1)
+                             for path in paths},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--paths', default='/,/projects,/contact')
+    parser.add_argument('--server', action='store_true',
+                        help='Also time gunicorn from launch to the first 200.')
+    args = parser.parse_args()
+    paths = args.paths.split(',')
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'projects.db')
+        shutil.copyfile(os.path.join(REPO_ROOT, 'projects.db'), db_path)
+        conn = sqlite3.connect(db_path)
+        conn.execute('PRAGMA user_version = 0')
+        conn.close()
+        cache_dir = os.path.join(tmp, 'jinja-cache')
+        env = {**os.environ, 'PROJECTS_DB': db_path, 'JINJA_CACHE_DIR': cache_dir,
+               'GUNICORN_ACCESS_LOG': '', 'RATE_LIMIT_DB': os.path.join(tmp, 'ratelimit.db')}
+        
+        results = {'schema_upgrade': summarize([probe(paths, env)], paths)}
+        
+        cold = []
+        for _ in range(args.runs):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(probe(paths, env))
+        results['cold_bytecode_cache'] = summarize(cold, paths)
+        results['warm_bytecode_cache'] = summarize([probe(paths, env) for _ in range(args.runs)], paths)
+        
+        if args.server:
+            command = [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', '127.0.0.1:{port}',
+                       '--workers', '1']
+            ttfr = [time_to_first_response(command, paths[-1], env) for _ in range(args.runs)]
+            results['gunicorn_first_response_ms'] = round(statistics.median(ttfr) * 1000, 1)
+    
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Reproducible micro-benchmarks and HTTP load tests for the DAL and every route.
+
+Seeds a projects database at each size (cached under --data-dir so
+reruns skip seeding), times every DatabaseManager method against a
+scratch copy, then serves app.py from another copy and drives each
+route with concurrent keep-alive clients. Results are printed (or
+written with --output) as JSON.
+
+Usage:
+    python benchmarks/bench_suite.py --sizes 10,10000 --output results.json
+    python benchmarks/bench_suite.py --sizes 10,10000 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DAL import LISTING_COLUMNS, DatabaseManager, Project, encode_cursor
+from loadgen import REPO_ROOT, local_server, percentiles, run_load
+
+DEFAULT_SIZES = (10, 10_000, 1_000_000)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+WORDS = ('vehicle booking portal restaurant delivery chapter website mobile android kotlin '
+         'django react flask analytics dashboard tracker fleet recipe budget calendar chat '
+         'weather inventory payroll survey portfolio engineering campus events members').split()
+
+# Metrics where a larger value is better; everything else is a latency
+THROUGHPUT_KEYS = ('ops_per_sec', 'rps')
+
+
+def synthetic_projects(rows, seed=0):
+    """Deterministic project rows spread over a year of creation times"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    for i in range(rows):
+        created = datetime.fromtimestamp(start + i * 31_536_000 / max(rows, 1), timezone.utc)
+        stamp = created.strftime('%Y-%m-%d %H:%M:%S')
+        yield {
+            'title': ' '.join(rng.choices(WORDS, k=3)).title(),
+            'description': ' '.join(rng.choices(WORDS, k=30)),
+            'image_file_name': rng.choice(('Vehicle.jpg', 'NsbeSite.png', 'restaurant.png')),
+            'created_at': stamp,
+            'updated_at': stamp,
+        }
+
+
+def seeded_database(rows, data_dir):
+    """Return the path of a database holding `rows` projects, seeding it once"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'projects-{rows}.db')
+    if os.path.exists(path):
+        return path
+    
+    tmp_path = path + '.seeding'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    manager = DatabaseManager(tmp_path, cache_ttl=0)
+    started = time.perf_counter()
+    manager.bulk_add_projects(synthetic_projects(rows), batch_size=10_000)
+    manager.close()
+    with sqlite3.connect(tmp_path) as conn:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    os.replace(tmp_path, path)
+    print(f'seeded {rows:,} rows in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+    return path
+
+
+def scratch_copy(path, directory):
+    target = os.path.join(directory, os.path.basename(path))
+    shutil.copyfile(path, target)
+    return target
+
+
+def time_calls(func, seconds, max_calls=100_000):
+    """Call `func` repeatedly for up to `seconds` and summarise the latencies"""
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while len(samples) < max_calls:
+        started = time.perf_counter()
+        func()
+        finished = time.perf_counter()
+        samples.append((finished - started) * 1e6)
+        if finished >= deadline:
+            break
+    total = sum(samples) / 1e6
+    return {
+        'calls': len(samples),
+        'ops_per_sec': round(len(samples) / total, 1) if total else None,
+        'latency_us': {name: round(value, 1) for name, value in percentiles(samples).items()},
+    }
+
+
+def micro_benchmarks(db_path, rows, seconds):
+    """Time each DatabaseManager method against a database of `rows` projects"""
+    manager = DatabaseManager(db_path, cache_ttl=0)
+    rng = random.Random(1)
+    page, next_cursor, _ = manager.get_projects_page(limit=20)
+    deep_cursor = None
+    if rows > 20:
+        with manager.connection() as conn:
+            middle = conn.execute(f"SELECT {', '.join(LISTING_COLUMNS)} FROM projects "
+                                  'ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?', (rows // 2,)).fetchone()
+        deep_cursor = encode_cursor(Project(*middle))
+    
+    def random_id():
+        return rng.randint(1, rows)
+    
+    cases = {
+        'get_projects_page_first': lambda: manager.get_projects_page(limit=20),
+        'get_project_by_id': lambda: manager.get_project_by_id(random_id()),
+        'project_exists': lambda: manager.project_exists(random_id()),
+        'search_projects': lambda: manager.search_projects(rng.choice(WORDS)),
+        'get_projects_version': manager.get_projects_version,
+        'iter_projects_1000': lambda: sum(1 for _ in zip(range(1000), manager.iter_projects())),
+        'add_project': lambda: manager.add_project('Bench', 'Added by the benchmark suite', 'bench.png'),
+        'update_project': lambda: manager.update_project(random_id(), 'Bench', 'Updated', 'bench.png'),
+        'bulk_add_projects_1000': lambda: manager.bulk_add_projects(synthetic_projects(1000, rng.random())),
+    }
+    if deep_cursor:
+        cases['get_projects_page_deep'] = lambda: manager.get_projects_page(after=deep_cursor, limit=20)
+    if rows <= 100_000:
+        # Loading every row is only meaningful while the table is small
+        cases['get_all_projects'] = manager.get_all_projects
+        cases['get_project_columns'] = manager.get_project_columns
+    # Deletes go last since they shrink the table the other cases read
+    cases['delete_project'] = lambda: manager.delete_project(random_id())
+    
+    results = {name: time_calls(func, seconds) for name, func in cases.items()}
+    manager.close()
+    return results
+
+
+def http_routes(base_url, db_path):
+    """Every route in app.py, with realistic arguments for this database"""
+    manager = DatabaseManager(db_path, cache_ttl=0)
+    _, next_cursor, _ = manager.get_projects_page(limit=20)
+    manager.close()
+    contact = urlencode({'firstName': 'Bench', 'lastName': 'Mark', 'email': 'bench@example.com',
+                         'password': 'benchmark123', 'confirmPassword': 'benchmark123',
+                         'message': 'Sent by the benchmark suite'})
+    project = urlencode({'title': 'Bench Project', 'description': 'Added by the benchmark suite',
+                         'imageFileName': 'Vehicle.jpg'})
+    routes = {
+        'GET /': ('GET', '/', None),
+        'GET /about': ('GET', '/about', None),
+        'GET /resume': ('GET', '/resume', None),
+        'GET /thankyou': ('GET', '/thankyou', None),
+        'GET /projects': ('GET', '/projects', None),
+        'GET /projects/search': ('GET', '/projects/search?q=vehicle+tracker', None),
+        'GET /contact': ('GET', '/contact', None),
+        'POST /contact': ('POST', '/contact', contact),
+        'GET /add_project': ('GET', '/add_project', None),
+        'POST /add_project': ('POST', '/add_project', project),
+        'GET /static/css/styles.css': ('GET', '/static/css/styles.css', None),
+        'GET /metrics': ('GET', '/metrics', None),
+    }
+    if next_cursor:
+        routes['GET /projects?after'] = ('GET', '/projects?' + urlencode({'after': next_cursor}), None)
+    return routes
+
+
+def load_tests(db_path, concurrency, seconds, server_command=None):
+    """Serve app.py from `db_path` and drive each route in turn"""
+    results = {}
+    with local_server(env={'PROJECTS_DB': db_path}, command=server_command) as base_url:
+        for name, (method, path, body) in http_routes(base_url, db_path).items():
+            results[name] = run_load(base_url, path, method=method, body=body,
+                                     concurrency=concurrency, duration=seconds)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def flatten(results, prefix=''):
+    """Turn nested results into {'10/micro/add_project/ops_per_sec': value}"""
+    flat = {}
+    for key, value in results.items():
+        path = f'{prefix}/{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current, baseline, threshold):
+    """List metrics that got worse than the baseline by more than `threshold`"""
+    regressions = []
+    now, before = flatten(current['sizes']), flatten(baseline['sizes'])
+    for key, old in sorted(before.items()):
+        new = now.get(key)
+        metric = key.rsplit('/', 1)[-1]
+        if new is None or not old or metric in ('calls', 'requests', 'errors') or '/statuses/' in key:
+            continue
+        if key.split('/')[-1] in THROUGHPUT_KEYS:
+            change = (old - new) / old
+        elif '/latency_' in key:
+            change = (new - old) / old
+        else:
+            continue
+        if change > threshold:
+            regressions.append({'metric': key, 'baseline': old, 'current': new,
+                                'worse_by': f'{change:.0%}'})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated row counts to seed and test.')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Where seeded databases are kept.')
+    parser.add_argument('--micro-seconds', type=float, default=1.0, help='Time budget per DAL method.')
+    parser.add_argument('--http-seconds', type=float, default=3.0, help='Load duration per route.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--skip-http', action='store_true')
+    parser.add_argument('--server-command', help="Serve with this command instead; '{port}' is substituted.")
+    parser.add_argument('--output', help='Write JSON results here instead of stdout.')
+    parser.add_argument('--compare', metavar='BASELINE', help='Flag regressions against a stored result file.')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Relative slowdown that counts as a regression.')
+    args = parser.parse_args()
+    
+    sizes = [int(size) for size in args.sizes.split(',')]
+    server_command = args.server_command.split() if args.server_command else None
+    results = {'environment': environment(), 'sizes': {}}
+    for rows in sizes:
+        seeded = seeded_database(rows, args.data_dir)
+        with tempfile.TemporaryDirectory() as scratch:
+            size_results = {'micro': micro_benchmarks(scratch_copy(seeded, scratch), rows, args.micro_seconds)}
+        if not args.skip_http:
+            with tempfile.TemporaryDirectory() as scratch:
+                size_results['http'] = load_tests(scratch_copy(seeded, scratch), args.concurrency,
+                                                  args.http_seconds, server_command)
+        results['sizes'][str(rows)] = size_results
+    
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        results['regressions'] = regressions
+        exit_code = 1 if regressions else 0
+        for regression in regressions:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> "
+                  f"{regression['current']} ({regression['worse_by']} worse)", file=sys.stderr)
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Throughput of the production gunicorn setup as the worker count grows.
+
+Each worker count is served from a scratch copy of projects.db and hit
+by several load-generator processes, so the client side isn't limited
+by one interpreter's GIL.
+
+Usage: python benchmarks/bench_workers.py [--workers 1,2,4,8] [--path /projects]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+from loadgen import REPO_ROOT, local_server, run_load
+
+
+def _client(args):
+    base_url, path, concurrency, duration = args
+    return run_load(base_url, path, concurrency=concurrency, duration=duration)
+
+
+def measure(workers, threads, path, clients, concurrency, duration, db_path):
+    command = [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', '127.0.0.1:{port}',
+               '--workers', str(workers), '--threads', str(threads)]
+    with local_server(env={'PROJECTS_DB': db_path, 'GUNICORN_ACCESS_LOG': ''},
+                      command=command) as base_url:
+        # One short round first so every worker has opened its connections
+        run_load(base_url, path, concurrency=workers * threads, duration=0.5, warmup=0)
+        with multiprocessing.Pool(clients) as pool:
+            runs = pool.map(_client, [(base_url, path, concurrency, duration)] * clients)
+    return {
+        'workers': workers,
+        'rps': round(sum(run['rps'] for run in runs), 1),
+        'errors': sum(run['errors'] for run in runs),
+        # Worst client's percentiles, since clients ran side by side
+        'latency_ms': {name: max(run['latency_ms'][name] or 0 for run in runs)
+                       for name in runs[0]['latency_ms']},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, cpus, cpus * 2 + 1})
+    parser.add_argument('--workers', default=','.join(map(str, default_workers)))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--path', default='/projects')
+    parser.add_argument('--clients', type=int, default=max(2, cpus // 2),
+                        help='Load-generator processes.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Connections per client.')
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+    
+    results = []
+    for workers in (int(count) for count in args.workers.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'projects.db')
+            shutil.copyfile(os.path.join(REPO_ROOT, 'projects.db'), db_path)
+            results.append(measure(workers, args.threads, args.path, args.clients,
+                                   args.concurrency, args.duration, db_path))
+    
+    baseline = results[0]['rps'] or 1
+    for result in results:
+        result['speedup'] = round(result['rps'] / baseline, 2)
+    print(json.dumps({'cpus': cpus, 'threads': args.threads, 'path': args.path,
+                      'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
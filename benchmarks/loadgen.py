@@ -0,0 +1,137 @@
+"""Concurrent HTTP load generator and a local server to point it at"""
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs app.py under Werkzeug's threaded server with HTTP/1.1 keep-alive
+DEV_SERVER = '''
+import sys
+from werkzeug.serving import WSGIRequestHandler, make_server
+from app import app
+WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+make_server('127.0.0.1', int(sys.argv[1]), app, threaded=True).serve_forever()
+'''
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Nearest-rank percentiles of `samples`, plus the max"""
+    if not samples:
+        return {**{f'p{p}': None for p in points}, 'max': None}
+    ordered = sorted(samples)
+    result = {f'p{p}': ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+    result['max'] = ordered[-1]
+    return result
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'Server did not start listening on port {port}')
+
+
+@contextmanager
+def local_server(env=None, command=None, port=None):
+    """Run a server in a subprocess and yield its base URL
+    
+    `command` is an argv list; '{port}' in it is replaced with the port.
+    The default is app.py under Werkzeug's threaded dev server.
+    """
+    port = port or free_port()
+    argv = [arg.replace('{port}', str(port)) for arg in command] if command else \
+        [sys.executable, '-c', DEV_SERVER, str(port)]
+    process = subprocess.Popen(argv, cwd=REPO_ROOT, env={**os.environ, **(env or {})},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run_load(base_url, path, method='GET', body=None, headers=None,
+             concurrency=8, duration=5.0, warmup=0.5):
+    """Drive one route from `concurrency` keep-alive clients for `duration` seconds
+    
+    Returns requests/sec, status counts, errors and latency percentiles
+    in milliseconds; requests in the first `warmup` seconds are not counted.
+    """
+    target = urlsplit(base_url)
+    headers = {'Connection': 'keep-alive', **(headers or {})}
+    if body is not None:
+        headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+    lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    errors = [0]
+    
+    def client():
+        conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        local_latencies = []
+        local_statuses = {}
+        local_errors = 0
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                break
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+                local_errors += 1
+                continue
+            if sent >= measure_from:
+                local_latencies.append((time.perf_counter() - sent) * 1000)
+                local_statuses[status] = local_statuses.get(status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+    
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / duration, 1),
+        'errors': errors[0],
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'latency_ms': {name: round(value, 3) if value is not None else None
+                       for name, value in percentiles(latencies).items()},
+    }
@@ -0,0 +1,211 @@
+"""Flask CLI commands for bulk project transfer, schema migrations, asset builds and templates"""
+import csv
+import json
+import os
+import time
+from contextlib import nullcontext
+
+import click
+from flask.cli import AppGroup
+
+from DAL import PROJECT_COLUMNS
+from assets import build_assets, CRITICAL_NAME, MANIFEST_NAME, OUTPUT_DIR
+from critical_css import DEFAULT_FOLD_ELEMENTS, extract_critical_css
+from images import DERIVED_DIR
+
+FORMATS = ('csv', 'ndjson')
+
+# How often long imports and exports print a progress line
+PROGRESS_EVERY = 100_000
+
+
+def read_projects(stream, fmt):
+    """Yield project mappings from a CSV or NDJSON text stream"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise click.ClickException(f'Line {line_number} is not valid JSON: {e}')
+
+
+def write_projects(stream, fmt, projects):
+    """Write Project records to a CSV or NDJSON text stream"""
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, PROJECT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(project.to_dict() for project in projects)
+        return
+    
+    for project in projects:
+        stream.write(json.dumps(project.to_dict()) + '\n')
+
+
+def detect_format(path, fmt=None):
+    """Use the explicit format, or infer it from the file extension"""
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    raise click.UsageError(f'Cannot tell the format of {path!r}; pass --format csv or --format ndjson')
+
+
+def _open(path, mode):
+    """Open a file for streaming, treating '-' as stdin/stdout"""
+    if path == '-':
+        return nullcontext(click.get_text_stream('stdin' if mode == 'r' else 'stdout'))
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+class _Progress:
+    """Pass items through while counting them and printing periodic throughput"""
+    
+    def __init__(self, items, label):
+        self.items = items
+        self.label = label
+        self.count = 0
+        self.start = time.perf_counter()
+    
+    def __iter__(self):
+        for item in self.items:
+            yield item
+            self.count += 1
+            if self.count % PROGRESS_EVERY == 0:
+                click.echo(f'{self.label} {self.count:,} rows ({self.rate():,.0f} rows/sec)', err=True)
+    
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.count / elapsed if elapsed > 0 else 0.0
+    
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        return f'{self.label} {self.count:,} rows in {elapsed:.2f}s ({self.rate():,.0f} rows/sec)'
+
+
+def compile_templates(jinja_env):
+    """Compile every template, filling the environment's bytecode cache; returns the count"""
+    names = jinja_env.list_templates()
+    for name in names:
+        jinja_env.get_template(name)
+    return len(names)
+
+
+def register_commands(app, db_manager):
+    """Attach the `flask projects` command group to the app"""
+    projects_cli = AppGroup('projects', help='Bulk import and export projects.')
+    
+    @projects_cli.command('import')
+    @click.argument('path', type=click.Path(allow_dash=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+    @click.option('--batch-size', default=5000, show_default=True, help='Rows per transaction.')
+    def import_projects(path, fmt, batch_size):
+        """Stream projects from a CSV or NDJSON file (or - for stdin)"""
+        fmt = detect_format(path, fmt)
+        with _open(path, 'r') as stream:
+            progress = _Progress(read_projects(stream, fmt), 'Imported')
+            try:
+                db_manager.bulk_add_projects(progress, batch_size)
+            except KeyError as e:
+                raise click.ClickException(
+                    f'Row {progress.count + 1:,} is missing required column {e}; earlier batches were kept')
+            except ValueError as e:
+                raise click.ClickException(
+                    f'Row {progress.count + 1:,} has an invalid timestamp ({e}); earlier batches were kept')
+        click.echo(progress.summary(), err=True)
+    
+    @projects_cli.command('export')
+    @click.argument('path', type=click.Path(allow_dash=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+    @click.option('--batch-size', default=5000, show_default=True, help='Rows per read query.')
+    def export_projects(path, fmt, batch_size):
+        """Stream every project to a CSV or NDJSON file (or - for stdout)"""
+        fmt = detect_format(path, fmt)
+        with _open(path, 'w') as stream:
+            progress = _Progress(db_manager.iter_projects(batch_size), 'Exported')
+            write_projects(stream, fmt, progress)
+        click.echo(progress.summary(), err=True)
+    
+    app.cli.add_command(projects_cli)
+    
+    db_cli = AppGroup('db', help='Inspect and upgrade the database schema.')
+    
+    @db_cli.command('status')
+    def status():
+        """Show the schema version and any pending migrations"""
+        version = db_manager.schema_version()
+        click.echo(f'Schema version {version} of {db_manager.migrator.target}')
+        for migration in db_manager.migrator.migrations[version:]:
+            click.echo(f'  pending {migration.version}: {migration.description}')
+    
+    @db_cli.command('migrate')
+    @click.option('--dry-run', is_flag=True, help='Estimate run times on a sample instead of migrating.')
+    @click.option('--batch-size', type=int, help="Rows per backfill transaction (default: each step's own).")
+    @click.option('--pause', default=0.0, show_default=True, help='Seconds to leave writers between batches.')
+    @click.option('--sample-rows', default=1000, show_default=True, help='Rows per table a dry run copies.')
+    def migrate(dry_run, batch_size, pause, sample_rows):
+        """Apply pending migrations; interrupted backfills resume where they stopped"""
+        if dry_run:
+            estimates = db_manager.plan_migrations(sample_rows)
+            for estimate in estimates:
+                kind = 'batched' if estimate['batched'] else 'one transaction'
+                click.echo(f"{estimate['version']}: {estimate['description']} - {estimate['rows']:,} rows, "
+                           f"about {estimate['seconds']:.1f}s ({kind})")
+            total = sum(estimate['seconds'] for estimate in estimates)
+            click.echo(f'{len(estimates)} pending migrations, about {total:.1f}s in total')
+            return
+        
+        def progress(migration, rows):
+            click.echo(f'  {migration.version}: {rows:,} rows backfilled', err=True)
+        
+        started = time.monotonic()
+        applied = db_manager.migrate(batch_size, pause, progress)
+        for migration in applied:
+            click.echo(f'Applied {migration.version}: {migration.description}')
+        click.echo(f'Schema is at version {db_manager.migrator.target} '
+                   f'({len(applied)} applied in {time.monotonic() - started:.1f}s)')
+    
+    app.cli.add_command(db_cli)
+    
+    assets_cli = AppGroup('assets', help='Build fingerprinted static assets.')
+    
+    @assets_cli.command('build')
+    @click.option('--fold-elements', default=DEFAULT_FOLD_ELEMENTS, show_default=True,
+                  help='Elements of <main> treated as above the fold.')
+    def build(fold_elements):
+        """Fingerprint, minify and precompress the static folder, then extract each page's critical CSS"""
+        output_root = os.path.join(app.static_folder, OUTPUT_DIR)
+        manifest = build_assets(app.static_folder, skip_dirs=(DERIVED_DIR,))
+        click.echo(f'Built {len(manifest)} assets into {output_root}')
+        
+        # Pages are rendered against the new build, with blocking stylesheets
+        assets = app.extensions['assets']
+        assets.load(os.path.join(output_root, MANIFEST_NAME))
+        assets.critical = {}
+        critical = extract_critical_css(app, fold_elements)
+        with open(os.path.join(output_root, CRITICAL_NAME), 'w') as f:
+            json.dump(critical, f, indent=2, sort_keys=True)
+        assets.load(os.path.join(output_root, MANIFEST_NAME))
+        for endpoint, css in sorted(critical.items()):
+            click.echo(f'  {endpoint}: {len(css):,} bytes of critical CSS')
+    
+    app.cli.add_command(assets_cli)
+    
+    templates_cli = AppGroup('templates', help='Precompile Jinja templates.')
+    
+    @templates_cli.command('compile')
+    def compile_all():
+        """Write every template's bytecode to the cache so workers skip compiling"""
+        count = compile_templates(app.jinja_env)
+        cache = app.jinja_env.bytecode_cache
+        where = f' into {cache.directory}' if hasattr(cache, 'directory') else ''
+        click.echo(f'Compiled {count} templates{where}')
+    
+    app.cli.add_command(templates_cli)
@@ -0,0 +1,213 @@
+"""Critical CSS: the rules each page needs for its first paint, and CSS minification"""
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+# Start tags inside <main> treated as above the fold; the header always is
+DEFAULT_FOLD_ELEMENTS = 30
+
+# Interaction states that can't apply before the page is first painted
+_STATE_PSEUDO = re.compile(r':(hover|focus|focus-within|focus-visible|active|visited)\b')
+_PSEUDO = re.compile(r'::?[a-zA-Z-]+(\([^)]*\))?')
+_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+_TOKENS = re.compile(r'([.#]?)(-?[_a-zA-Z][_a-zA-Z0-9-]*)')
+_ANIMATION = re.compile(r'animation(?:-name)?\s*:\s*([^;}]+)')
+_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_STRING = re.compile(r'''("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')''')
+
+# Selectors that match the document itself and so always apply
+_ALWAYS = {'*', ':root', 'html', 'body'}
+
+
+def minify_css(css):
+    """Strip comments and insignificant whitespace from a stylesheet"""
+    parts = _STRING.split(_COMMENT.sub('', css))
+    # Odd indexes are quoted strings, kept verbatim
+    for index in range(0, len(parts), 2):
+        text = re.sub(r'\s+', ' ', parts[index])
+        text = re.sub(r'\s*([{};,>~+])\s*', r'\1', text)
+        # Only in declarations; in a selector ' :' means a descendant
+        text = re.sub(r'\s*:\s*(?=[^{};]*(?:[;}]|\Z))', ':', text)
+        parts[index] = text.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def parse_css(css):
+    """Split a stylesheet into (prelude, body) blocks; @media bodies are parsed into lists
+    
+    Statements without a block, such as @import, come back with a body
+    of None.
+    """
+    css = _COMMENT.sub('', css)
+    blocks, _ = _parse_blocks(css, 0)
+    return blocks
+
+
+def _parse_blocks(css, position):
+    blocks = []
+    start = position
+    while position < len(css):
+        char = css[position]
+        if char in '"\'':
+            position = _STRING.match(css, position).end()
+            continue
+        if char == ';' and css[start:position].strip().startswith('@'):
+            blocks.append((css[start:position].strip(), None))
+            start = position = position + 1
+            continue
+        if char == '{':
+            prelude = css[start:position].strip()
+            if prelude.startswith(('@media', '@supports')):
+                body, position = _parse_blocks(css, position + 1)
+            else:
+                end = _block_end(css, position + 1)
+                body, position = css[position + 1:end].strip(), end + 1
+            blocks.append((prelude, body))
+            start = position
+            continue
+        if char == '}':
+            return blocks, position + 1
+        position += 1
+    return blocks, position
+
+
+def _block_end(css, position):
+    depth = 1
+    while depth:
+        char = css[position]
+        if char in '"\'':
+            position = _STRING.match(css, position).end()
+            continue
+        depth += {'{': 1, '}': -1}.get(char, 0)
+        position += 1
+    return position - 1
+
+
+class AboveTheFold(HTMLParser):
+    """Collects the tags, classes and ids of a page's first screen, and its stylesheets"""
+    
+    def __init__(self, fold_elements=DEFAULT_FOLD_ELEMENTS):
+        super().__init__()
+        self.fold_elements = fold_elements
+        self.tokens = set(_ALWAYS)
+        self.stylesheets = []
+        self._in_main = False
+        self._main_elements = 0
+        self._done = False
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'link' and 'stylesheet' in (attrs.get('rel') or '').split():
+            self.stylesheets.append(attrs.get('href'))
+        if tag == 'link' and attrs.get('rel') == 'preload' and attrs.get('as') == 'style':
+            self.stylesheets.append(attrs.get('href'))
+        if tag == 'main':
+            self._in_main = True
+        elif self._in_main:
+            self._main_elements += 1
+            if self._main_elements > self.fold_elements:
+                self._done = True
+        if tag == 'footer':
+            self._done = True
+        if self._done:
+            return
+        self.tokens.add(tag)
+        self.tokens.update('.' + name for name in (attrs.get('class') or '').split())
+        if attrs.get('id'):
+            self.tokens.add('#' + attrs['id'])
+
+
+def _selector_applies(selector, tokens):
+    if selector in _ALWAYS:
+        return True
+    if _STATE_PSEUDO.search(selector):
+        return False
+    bare = _PSEUDO.sub(' ', _ATTRIBUTE.sub(' ', selector))
+    found = [prefix + name for prefix, name in _TOKENS.findall(bare)]
+    return all(token in tokens for token in found)
+
+
+def critical_rules(css, tokens):
+    """The rules of a stylesheet that can match any of `tokens`, minified
+    
+    `tokens` holds tag names, '.class' and '#id' strings. A selector is
+    kept when every tag, class and id it names is present; that ignores
+    combinators, so it errs toward keeping rules. Rules for interaction
+    states are dropped, @import is left to the full stylesheet, and
+    @keyframes are kept when a kept rule animates with them.
+    """
+    kept = _select(parse_css(css), tokens)
+    animations = {name.strip() for body in _bodies(kept)
+                  for value in _ANIMATION.findall(body) for name in value.replace(',', ' ').split()}
+    output = []
+    for prelude, body in parse_css(css):
+        if prelude.startswith('@keyframes') and prelude.split(None, 1)[1].strip() in animations:
+            output.append(f'{prelude}{{{body}}}')
+    output.extend(_format(kept))
+    return minify_css('\n'.join(output))
+
+
+def _select(blocks, tokens):
+    kept = []
+    for prelude, body in blocks:
+        if body is None or prelude.startswith(('@keyframes', '@font-face', '@page')):
+            continue
+        if isinstance(body, list):
+            inner = _select(body, tokens)
+            if inner:
+                kept.append((prelude, inner))
+            continue
+        selectors = [selector.strip() for selector in prelude.split(',')]
+        applicable = [selector for selector in selectors if _selector_applies(selector, tokens)]
+        if applicable:
+            kept.append((', '.join(applicable), body))
+    return kept
+
+
+def _bodies(blocks):
+    for _, body in blocks:
+        if isinstance(body, list):
+            yield from _bodies(body)
+        else:
+            yield body
+
+
+def _format(blocks):
+    for prelude, body in blocks:
+        if isinstance(body, list):
+            yield f"{prelude}{{{''.join(_format(body))}}}"
+        else:
+            yield f'{prelude}{{{body}}}'
+
+
+def extract_critical_css(app, fold_elements=DEFAULT_FOLD_ELEMENTS):
+    """Render every argument-free GET page of `app` and extract its critical CSS
+    
+    Returns {endpoint: css}. Each page's stylesheets are read from the
+    static folder, so run this once assets are built and pages link the
+    files that will be served.
+    """
+    client = app.test_client()
+    static_prefix = app.static_url_path.rstrip('/') + '/'
+    critical = {}
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.arguments or rule.endpoint == 'static':
+            continue
+        response = client.get(rule.rule)
+        if response.status_code != 200 or response.mimetype != 'text/html':
+            response.close()
+            continue
+        page = AboveTheFold(fold_elements)
+        page.feed(response.get_data(as_text=True))
+        response.close()
+        
+        css = []
+        for href in page.stylesheets:
+            path = urlsplit(href or '').path
+            if path.startswith(static_prefix):
+                with open(os.path.join(app.static_folder, *path[len(static_prefix):].split('/'))) as f:
+                    css.append(f.read())
+        if css:
+            critical[rule.endpoint] = critical_rules('\n'.join(css), page.tokens)
+    return critical
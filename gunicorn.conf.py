@@ -0,0 +1,77 @@
+"""Gunicorn settings for serving app.py in production
+
+Run with `gunicorn app:app`; every setting can be overridden from the
+environment so the container image needs no rebuild to retune it.
+
+Reloading without dropping connections:
+    kill -HUP <master>    replace workers gracefully (same code, since it is preloaded)
+    kill -USR2 <master>   start a new master running the new code on the same socket,
+                          then `kill -QUIT <old master>` once it is serving
+"""
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+# Processes give CPU parallelism; threads cover time spent waiting on SQLite
+# and the network without the memory cost of more processes
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the app once in the master so workers share its pages copy-on-write
+preload_app = True
+
+# Longer than a typical load balancer's idle timeout, so the proxy closes first
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 75))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers now and then, staggered so they never restart together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10_000))
+max_requests_jitter = max_requests // 10
+
+# Heartbeat files on tmpfs, so a slow overlay filesystem can't stall workers
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Rate-limit buckets live in a SQLite file every worker shares; read by app.py
+os.environ.setdefault('RATE_LIMIT_DB', os.path.join(worker_tmp_dir or tempfile.gettempdir(),
+                                                    'flask-site-ratelimit.db'))
+
+# An empty GUNICORN_ACCESS_LOG turns request logging off
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+pidfile = os.environ.get('GUNICORN_PIDFILE')
+
+
+def when_ready(server):
+    # Do first-request work once in the master rather than in every worker
+    app = sys.modules.get('app')
+    if app is not None:
+        app.warm_up()
+    # Objects built while preloading won't be freed, so keep the collector
+    # from touching (and copying) their pages in every worker
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # Only present in the master when the app was preloaded
+    app = sys.modules.get('app')
+    if app is not None:
+        app.before_fork()
+
+
+def post_fork(server, worker):
+    app = sys.modules.get('app')
+    if app is not None:
+        app.after_fork()
+
+
+def worker_exit(server, worker):
+    # Write out contact messages still queued in this worker
+    app = sys.modules.get('app')
+    if app is not None:
+        app.contact_writer.close()
@@ -0,0 +1,206 @@
+"""HTTP-level caching for rendered pages"""
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import current_app, request, session
+from werkzeug.http import is_resource_modified
+
+
+def fingerprint_directory(path, extra_files=()):
+    """Return (digest, mtime) covering every file under `path`, and `extra_files`
+    
+    Used as a build identifier: it changes whenever a template changes,
+    or any of `extra_files` (such as an asset manifest) is rebuilt, and
+    is the same in every worker that runs the same deploy. Missing extra
+    files are skipped.
+    """
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        files.extend((os.path.relpath(os.path.join(root, name), path), os.path.join(root, name))
+                     for name in sorted(names))
+    files.extend((os.path.basename(file_path), file_path)
+                 for file_path in extra_files if os.path.isfile(file_path))
+    
+    digest = hashlib.sha256()
+    newest = 0.0
+    for name, file_path in files:
+        digest.update(name.encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            digest.update(f.read())
+        newest = max(newest, os.path.getmtime(file_path))
+    return digest.hexdigest()[:16], datetime.fromtimestamp(int(newest), timezone.utc)
+
+
+def _has_pending_flashes():
+    """True if base.html would render flashed messages into this response"""
+    return '_flashes' in session
+
+
+def conditional(validators):
+    """Decorator that answers conditional GETs with 304 before the view runs
+    
+    `validators` receives the view arguments and returns (etag,
+    last_modified); it should be much cheaper than the view itself.
+    Full responses get the same ETag and Last-Modified headers.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or _has_pending_flashes():
+                return view(*args, **kwargs)
+            
+            etag, last_modified = validators(*args, **kwargs)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        
+        return wrapper
+    return decorator
+
+
+class CachedPage:
+    """A rendered response body and the headers needed to replay it"""
+    
+    __slots__ = ('body', 'content_type', 'etag')
+    
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+
+class ResponseCache:
+    """In-memory cache of rendered pages, bounded by total body size
+    
+    Views wrapped with `cached` are keyed by path, query string and the
+    request headers named in `vary`. A hit replays the stored bytes
+    without calling the view, so the template engine is never entered.
+    Cached pages carry a strong ETag of their content, so repeat
+    visitors are answered with 304.
+    """
+    
+    def __init__(self, app=None, max_bytes=4 * 1024 * 1024, vary=('Accept-Language',)):
+        """Create a cache that holds at most `max_bytes` of page bodies"""
+        self.max_bytes = max_bytes
+        self.vary = tuple(vary)
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Register the cache on an app and set its config defaults"""
+        app.config.setdefault('PAGE_CACHE_ENABLED', True)
+        app.extensions['page_cache'] = self
+    
+    def cached(self, view):
+        """Decorator that serves a view's 200 responses from the cache"""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self._is_cacheable_request():
+                self._count('bypasses')
+                return view(*args, **kwargs)
+            
+            key = self._key()
+            page = self.get(key)
+            if page is not None:
+                self._count('hits')
+                response = current_app.response_class(page.body, content_type=page.content_type)
+                response.headers['X-Cache'] = 'HIT'
+                return self._make_conditional(response, page)
+            
+            self._count('misses')
+            response = current_app.make_response(view(*args, **kwargs))
+            response.headers['X-Cache'] = 'MISS'
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            page = CachedPage(response.get_data(), response.content_type)
+            self.set(key, page)
+            return self._make_conditional(response, page)
+        
+        return wrapper
+    
+    def _is_cacheable_request(self):
+        """Only cache anonymous GETs whose page carries no flashed messages"""
+        return (current_app.config['PAGE_CACHE_ENABLED']
+                and not current_app.debug
+                and request.method in ('GET', 'HEAD')
+                and not _has_pending_flashes())
+    
+    def _make_conditional(self, response, page):
+        """Tag a response with the page's ETag and turn it into a 304 if the client has it"""
+        response.set_etag(page.etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    
+    def _key(self):
+        return ((request.script_root, request.path, request.query_string)
+                + tuple(request.headers.get(name) for name in self.vary))
+    
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def get(self, key):
+        """Return the cached page for `key`, marking it most recently used"""
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None:
+                self._entries.move_to_end(key)
+            return page
+    
+    def set(self, key, page):
+        """Store a page, evicting least recently used pages to stay under max_bytes"""
+        size = len(page.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.body)
+            self._entries[key] = page
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+    
+    def clear(self):
+        """Drop every cached page"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    def prerender(self, app, paths):
+        """Render `paths` through the full app once so the first visitors get hits"""
+        client = app.test_client()
+        for path in paths:
+            client.get(path)
+    
+    def stats(self):
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'entries': len(self._entries),
+                'bytes': self._size,
+            }
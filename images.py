@@ -0,0 +1,228 @@
+"""Responsive image derivatives for project screenshots"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import safe_join
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is optional; templates fall back to the original file
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Subdirectory of the static folder that derivatives are written to
+DERIVED_DIR = 'derived'
+
+# Rewritten in the output folder after every index, for state()
+STAMP_NAME = '.indexed'
+
+# Widths to generate: the 120px table thumbnail at 1x, 2x and 4x density
+WIDTHS = (120, 240, 480)
+
+# Modern formats in order of preference, with their MIME types
+MODERN_FORMATS = (('avif', 'image/avif'), ('webp', 'image/webp'))
+
+QUALITY = {'avif': 55, 'webp': 75, 'jpeg': 80}
+
+
+def available_formats():
+    """Modern formats this Pillow build can encode"""
+    if Image is None:
+        return ()
+    return tuple(fmt for fmt, _ in MODERN_FORMATS if features.check(fmt))
+
+
+class ImageVariants:
+    """Generated derivatives of one source image, ready for a <picture> element"""
+    
+    def __init__(self, sources, fallback, fallback_srcset):
+        self.sources = sources
+        self.fallback = fallback
+        self.fallback_srcset = fallback_srcset
+
+
+class ImagePipeline:
+    """Builds resized and re-encoded copies of images in a background pool
+    
+    Derivatives are written to `output_dir` named after a hash of the
+    source file, so an edited image gets new files and stale ones are
+    never served. A small JSON index per source is written last and
+    marks the set as complete. Sources that can't be decoded are logged
+    and not retried until they change.
+    """
+    
+    def __init__(self, source_dir, output_dir, widths=WIDTHS, formats=None, max_workers=2):
+        """Create a pipeline reading from `source_dir` and writing to `output_dir`"""
+        self.source_dir = source_dir
+        self.output_dir = output_dir
+        self.widths = tuple(sorted(widths))
+        self.formats = available_formats() if formats is None else tuple(formats)
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = {}
+        self._failed = set()
+        self._digests = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        return Image is not None
+    
+    def _source_path(self, filename):
+        path = safe_join(self.source_dir, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        return path
+    
+    def _digest(self, path):
+        """Hash a source file, re-reading it only when its size or mtime changes"""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._digests.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        self._digests[path] = (signature, digest.hexdigest()[:12])
+        return self._digests[path][1]
+    
+    def _index_path(self, filename, digest):
+        stem = os.path.splitext(filename)[0]
+        return os.path.join(self.output_dir, f'{stem}.{digest}.json')
+    
+    def submit(self, filename):
+        """Queue derivative generation for `filename`; returns a Future or None
+        
+        Returns None when Pillow is missing, the file doesn't exist, the
+        derivatives are already built, or building them failed before.
+        """
+        if not self.enabled:
+            return None
+        path = self._source_path(filename)
+        if path is None:
+            return None
+        digest = self._digest(path)
+        if digest in self._failed or os.path.isfile(self._index_path(filename, digest)):
+            return None
+        
+        with self._lock:
+            future = self._pending.get(digest)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='images')
+                future = self._executor.submit(self.generate, filename)
+                future.add_done_callback(lambda done: self._finished(filename, digest, done))
+                self._pending[digest] = future
+            return future
+    
+    def _finished(self, filename, digest, future):
+        error = future.exception()
+        with self._lock:
+            self._pending.pop(digest, None)
+            if error is not None:
+                self._failed.add(digest)
+        if error is not None:
+            logger.warning('Could not build image variants of %s', filename, exc_info=error)
+    
+    def state(self):
+        """A token that changes whenever an index is written, by any process
+        
+        Rendered markup changes when an image's variants appear, so page
+        validators include this. It is read from disk, so every worker
+        serving the same files agrees on it.
+        """
+        try:
+            return str(os.stat(os.path.join(self.output_dir, STAMP_NAME)).st_mtime_ns)
+        except FileNotFoundError:
+            return '0'
+    
+    def generate(self, filename):
+        """Build every derivative of `filename` now and return its index"""
+        path = self._source_path(filename)
+        if path is None:
+            raise FileNotFoundError(filename)
+        digest = self._digest(path)
+        stem = os.path.splitext(filename)[0]
+        os.makedirs(os.path.dirname(os.path.join(self.output_dir, filename)), exist_ok=True)
+        
+        with Image.open(path) as source:
+            source.load()
+            has_alpha = source.mode in ('RGBA', 'LA') or 'transparency' in source.info
+            image = source.convert('RGBA' if has_alpha else 'RGB')
+        
+        fallback_format = 'png' if has_alpha else 'jpeg'
+        # Never upscale: widths beyond the source collapse into the source width
+        widths = sorted({min(width, image.width) for width in self.widths})
+        index = {'fallback': fallback_format, 'formats': {}}
+        for fmt in (*self.formats, fallback_format):
+            index['formats'][fmt] = []
+            for width in widths:
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                name = f'{stem}.{digest}.{width}w.{"jpg" if fmt == "jpeg" else fmt}'
+                self._save(resized, os.path.join(self.output_dir, name), fmt)
+                index['formats'][fmt].append([width, name])
+        
+        index_path = self._index_path(filename, digest)
+        self._write_atomic(index_path, json.dumps(index).encode('utf-8'))
+        self._write_atomic(os.path.join(self.output_dir, STAMP_NAME), os.path.basename(index_path).encode('utf-8'))
+        return index
+    
+    def _save(self, image, target, fmt):
+        options = {'quality': QUALITY[fmt]} if fmt in QUALITY else {'optimize': True}
+        tmp = f'{target}.{threading.get_ident()}.tmp'
+        image.save(tmp, format=fmt.upper(), **options)
+        os.replace(tmp, target)
+    
+    def _write_atomic(self, target, data):
+        tmp = f'{target}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+    
+    def variants(self, filename, url_for_derived):
+        """Return ImageVariants for `filename`, or None if they aren't built yet
+        
+        A miss queues generation, so the next render can use them.
+        `url_for_derived` maps a derivative's name to its URL.
+        """
+        if not self.enabled:
+            return None
+        path = self._source_path(filename)
+        if path is None:
+            return None
+        try:
+            with open(self._index_path(filename, self._digest(path))) as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            self.submit(filename)
+            return None
+        
+        def srcset(fmt):
+            return ', '.join(f'{url_for_derived(name)} {width}w' for width, name in index['formats'][fmt])
+        
+        mime_types = dict(MODERN_FORMATS)
+        sources = [(mime_types[fmt], srcset(fmt)) for fmt in self.formats if fmt in index['formats']]
+        fallback = index['formats'][index['fallback']]
+        return ImageVariants(sources, url_for_derived(fallback[0][1]), srcset(index['fallback']))
+    
+    def shutdown(self, wait=True):
+        """Stop the worker pool, optionally waiting for queued work"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    
+    def after_fork(self):
+        """Drop the executor and pending jobs inherited from the parent process"""
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
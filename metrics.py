@@ -0,0 +1,258 @@
+"""Request instrumentation exposed in the Prometheus text format"""
+import bisect
+import functools
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+
+# Latency bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Fixed-bucket histogram; observing is a bisect and two additions"""
+    
+    __slots__ = ('buckets', 'counts', 'total', 'count', '_lock')
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+    
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+    
+    def quantile(self, q, counts=None, count=None):
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if counts is None:
+            counts, _, count = self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class Family:
+    """A named metric with one child per label-value tuple"""
+    
+    def __init__(self, name, help_text, metric_type, label_names, factory):
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self.label_names = label_names
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+    
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+    
+    def items(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class Counter:
+    """Monotonic counter, also usable as a gauge through add()"""
+    
+    __slots__ = ('value', '_lock')
+    
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+    
+    def add(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metrics:
+    """Per-endpoint latency, status and in-flight metrics, plus DB and template timing
+    
+    Recording is a few dictionary lookups and locked additions per
+    request; formatting only happens when /metrics is scraped.
+    """
+    
+    def __init__(self, app=None, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._families = []
+        self._collectors = []
+        self.request_duration = self.histogram(
+            'http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint',))
+        self.requests = self.counter(
+            'http_requests_total', 'Requests by endpoint, method and status.', ('endpoint', 'method', 'status'))
+        self.in_flight = self.gauge(
+            'http_requests_in_flight', 'Requests currently being handled.', ('endpoint',))
+        self.request_db = self.histogram(
+            'http_request_db_seconds', 'Time per request spent in DatabaseManager calls.', ('endpoint',))
+        self.request_template = self.histogram(
+            'http_request_template_seconds', 'Time per request spent rendering templates.', ('endpoint',))
+        self.db_calls = self.histogram(
+            'db_call_duration_seconds', 'DatabaseManager call latency by method.', ('method',))
+        self.template_renders = self.histogram(
+            'template_render_duration_seconds', 'Template render latency by template.', ('template',))
+        if app is not None:
+            self.init_app(app)
+    
+    def histogram(self, name, help_text, label_names):
+        family = Family(name, help_text, 'histogram', label_names, lambda: Histogram(self.buckets))
+        self._families.append(family)
+        return family
+    
+    def counter(self, name, help_text, label_names):
+        family = Family(name, help_text, 'counter', label_names, Counter)
+        self._families.append(family)
+        return family
+    
+    def gauge(self, name, help_text, label_names):
+        family = Family(name, help_text, 'gauge', label_names, Counter)
+        self._families.append(family)
+        return family
+    
+    def add_collector(self, collect):
+        """Register a callable returning (name, type, help, value) tuples at scrape time"""
+        self._collectors.append(collect)
+        return collect
+    
+    def init_app(self, app):
+        """Hook request and template signals and add the /metrics route"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.render)
+        app.extensions['metrics'] = self
+    
+    def instrument(self, obj, method_names):
+        """Wrap methods of `obj` so each call is timed and charged to the current request"""
+        for name in method_names:
+            setattr(obj, name, self._timed(name, getattr(obj, name)))
+    
+    def _timed(self, name, method):
+        histogram = self.db_calls.labels(name)
+        
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                histogram.observe(elapsed)
+                if has_request_context() and '_metrics_start' in g:
+                    g._metrics_db += elapsed
+        
+        return wrapper
+    
+    @staticmethod
+    def _endpoint():
+        return request.endpoint or '<unmatched>'
+    
+    def _before_request(self):
+        g._metrics_start = time.perf_counter()
+        g._metrics_db = 0.0
+        g._metrics_template = 0.0
+        g._metrics_renders = []
+        self.in_flight.labels(self._endpoint()).add(1)
+    
+    def _after_request(self, response):
+        if '_metrics_start' in g:
+            endpoint = self._endpoint()
+            self.request_duration.labels(endpoint).observe(time.perf_counter() - g._metrics_start)
+            self.request_db.labels(endpoint).observe(g._metrics_db)
+            self.request_template.labels(endpoint).observe(g._metrics_template)
+            self.requests.labels(endpoint, request.method, str(response.status_code)).add()
+        return response
+    
+    def _teardown_request(self, exc):
+        if '_metrics_start' in g:
+            self.in_flight.labels(self._endpoint()).add(-1)
+    
+    def _before_render(self, app, template, context):
+        if '_metrics_start' in g:
+            g._metrics_renders.append(time.perf_counter())
+    
+    def _after_render(self, app, template, context):
+        if '_metrics_start' in g and g._metrics_renders:
+            elapsed = time.perf_counter() - g._metrics_renders.pop()
+            self.template_renders.labels(template.name or '<string>').observe(elapsed)
+            # Only the outermost render counts toward the request's template time
+            if not g._metrics_renders:
+                g._metrics_template += elapsed
+    
+    def render(self):
+        """The /metrics view"""
+        return Response(self.exposition(), content_type=CONTENT_TYPE)
+    
+    def exposition(self):
+        """Format every metric in the Prometheus text exposition format"""
+        lines = []
+        for family in self._families:
+            lines.append(f'# HELP {family.name} {family.help_text}')
+            lines.append(f'# TYPE {family.name} {family.metric_type}')
+            quantile_lines = []
+            for values, child in family.items():
+                if family.metric_type != 'histogram':
+                    lines.append(f'{family.name}{_labels(family.label_names, values)} {child.value}')
+                    continue
+                counts, total, count = child.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip((*child.buckets, '+Inf'), counts):
+                    cumulative += bucket_count
+                    le = _labels(family.label_names, values, [('le', bound)])
+                    lines.append(f'{family.name}_bucket{le} {cumulative}')
+                lines.append(f'{family.name}_sum{_labels(family.label_names, values)} {total}')
+                lines.append(f'{family.name}_count{_labels(family.label_names, values)} {count}')
+                for q in QUANTILES:
+                    label = _labels(family.label_names, values, [('quantile', q)])
+                    quantile_lines.append(f'{family.name}_quantile{label} {child.quantile(q, counts, count):.6f}')
+            if quantile_lines:
+                lines.append(f'# HELP {family.name}_quantile Estimated from {family.name} buckets.')
+                lines.append(f'# TYPE {family.name}_quantile gauge')
+                lines.extend(quantile_lines)
+        
+        for collect in self._collectors:
+            for name, metric_type, help_text, value in collect():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,234 @@
+"""Ordered schema migrations tracked by PRAGMA user_version"""
+import sqlite3
+import time
+
+
+def user_version(conn):
+    """The number of the last migration applied to a connection's database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def _table_exists(conn, table):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return row is not None
+
+
+def _count_rows(conn, table, after_id=0):
+    if not _table_exists(conn, table):
+        return 0
+    return conn.execute(f'SELECT COUNT(*) FROM "{table}" WHERE id > ?', (after_id,)).fetchone()[0]
+
+
+class Migration:
+    """One schema change, applied in a single transaction
+    
+    `apply` receives a cursor inside a BEGIN IMMEDIATE transaction, and
+    the new user_version is committed with its changes. `table` names the
+    table the work grows with, for dry-run estimates. Under WAL, readers
+    carry on during the transaction but writers wait for it, so work
+    over every row of a big table belongs in a Backfill.
+    """
+    
+    batched = False
+    
+    def __init__(self, version, description, apply, table=None):
+        self.version = version
+        self.description = description
+        self.apply = apply
+        self.table = table
+    
+    def remaining_rows(self, conn):
+        """Rows of `table` this migration still has to process"""
+        return _count_rows(conn, self.table) if self.table else 0
+    
+    def run(self, conn, batch_size=None, pause=0.0, progress=None):
+        """Apply the migration unless another process already has"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if user_version(conn) >= self.version:
+                conn.rollback()
+                return
+            self.apply(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {int(self.version)}')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.version}: {self.description}>'
+
+
+class Backfill(Migration):
+    """Rows of `table` rewritten in id order, one short transaction per batch
+    
+    `sql` is executed with (low, high) parameters and should only touch
+    rows with low < id <= high. The last id done is committed with each
+    batch, so a backfill that is interrupted, or run by two processes at
+    once, carries on from where it got to. Writers get the database
+    between batches, for `pause` seconds if given.
+    
+    Code running while a backfill is in progress must cope with rows on
+    either side of it, and must itself write whatever the backfill fills
+    in for new rows.
+    """
+    
+    batched = True
+    
+    def __init__(self, version, description, table, sql, batch_size=1000):
+        super().__init__(version, description, None, table)
+        self.sql = sql
+        self.batch_size = batch_size
+    
+    def resume_point(self, conn):
+        """The last id already backfilled, or 0"""
+        if not _table_exists(conn, 'migration_progress'):
+            return 0
+        row = conn.execute('SELECT last_id FROM migration_progress WHERE version = ?',
+                           (self.version,)).fetchone()
+        return row[0] if row else 0
+    
+    def remaining_rows(self, conn):
+        return _count_rows(conn, self.table, self.resume_point(conn))
+    
+    def run(self, conn, batch_size=None, pause=0.0, progress=None):
+        """Backfill batch by batch, then record the migration as applied"""
+        batch_size = batch_size or self.batch_size
+        done = 0
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if user_version(conn) >= self.version:
+                    conn.rollback()
+                    return
+                low = self.resume_point(conn)
+                row = conn.execute(f'SELECT id FROM "{self.table}" WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?',
+                                   (low, batch_size - 1)).fetchone()
+                high = row[0] if row else conn.execute(f'SELECT MAX(id) FROM "{self.table}"').fetchone()[0]
+                if high is None or high <= low:
+                    conn.execute('DELETE FROM migration_progress WHERE version = ?', (self.version,))
+                    conn.execute(f'PRAGMA user_version = {int(self.version)}')
+                    conn.commit()
+                    return
+                cursor = conn.execute(self.sql, (low, high))
+                conn.execute('INSERT OR REPLACE INTO migration_progress (version, last_id) VALUES (?, ?)',
+                             (self.version, high))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            done += max(cursor.rowcount, 0)
+            if progress is not None:
+                progress(self, done)
+            if pause:
+                time.sleep(pause)
+
+
+class Migrator:
+    """Brings a database up to the last of an ordered list of migrations"""
+    
+    def __init__(self, migrations):
+        """Check that `migrations` are numbered 1, 2, 3... in order"""
+        versions = [migration.version for migration in migrations]
+        if versions != list(range(1, len(versions) + 1)):
+            raise ValueError(f'Migration versions must run 1, 2, 3... without gaps; got {versions}')
+        self.migrations = tuple(migrations)
+    
+    @property
+    def target(self):
+        """The schema version after every migration has run"""
+        return len(self.migrations)
+    
+    def pending(self, conn):
+        """Migrations not yet applied to the connection's database"""
+        return list(self.migrations[user_version(conn):])
+    
+    def migrate(self, conn, batch_size=None, pause=0.0, progress=None):
+        """Apply pending migrations in order; returns the ones that ran
+        
+        A database that is already current costs a single PRAGMA read.
+        `batch_size` and `pause` override each Backfill's own settings,
+        and `progress(migration, rows_done)` is called after each batch.
+        """
+        pending = self.pending(conn)
+        if not pending:
+            return []
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS migration_progress (
+                version INTEGER PRIMARY KEY,
+                last_id INTEGER NOT NULL
+            )
+        ''')
+        conn.commit()
+        for migration in pending:
+            migration.run(conn, batch_size, pause, progress)
+        return pending
+    
+    def estimate(self, conn, sample_rows=1000, batch_size=None):
+        """Time pending migrations on a sample of the database without changing it
+        
+        The schema and up to `sample_rows` rows of each table are copied
+        into memory, the migrations are run there, and each one's time is
+        scaled up by how many rows it has to process in the real database.
+        Returns a dict per migration with its rows and estimated seconds.
+        """
+        pending = self.pending(conn)
+        if not pending:
+            return []
+        path = next(row[2] for row in conn.execute('PRAGMA database_list') if row[1] == 'main')
+        scratch = sqlite3.connect('file::memory:', uri=True)
+        try:
+            scratch.execute('ATTACH DATABASE ? AS src', (f'file:{path}?mode=ro',))
+            _copy_sample(scratch, sample_rows)
+            scratch.execute('DETACH DATABASE src')
+            scratch.execute(f'PRAGMA user_version = {user_version(conn)}')
+            scratch.execute('CREATE TABLE IF NOT EXISTS migration_progress '
+                            '(version INTEGER PRIMARY KEY, last_id INTEGER NOT NULL)')
+            scratch.commit()
+            
+            estimates = []
+            for migration in pending:
+                rows = migration.remaining_rows(conn) if migration.table else 0
+                sampled = migration.remaining_rows(scratch) if migration.table else 0
+                start = time.perf_counter()
+                migration.run(scratch, batch_size)
+                elapsed = time.perf_counter() - start
+                estimates.append({
+                    'version': migration.version,
+                    'description': migration.description,
+                    'table': migration.table,
+                    'batched': migration.batched,
+                    'rows': rows,
+                    'seconds': elapsed * rows / sampled if sampled else elapsed,
+                })
+            return estimates
+        finally:
+            scratch.close()
+
+
+def _copy_sample(scratch, sample_rows):
+    """Copy src's schema, and the first `sample_rows` rows of each table, into main"""
+    objects = scratch.execute('''
+        SELECT type, name, sql FROM src.sqlite_master
+        WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid
+    ''').fetchall()
+    virtual = [(name, sql) for type_, name, sql in objects
+               if type_ == 'table' and sql.upper().startswith('CREATE VIRTUAL TABLE')]
+    
+    def is_shadow(name):
+        return any(name.startswith(f'{table}_') for table, _ in virtual)
+    
+    tables = [(name, sql) for type_, name, sql in objects if type_ == 'table' and not is_shadow(name)]
+    for _, sql in tables:
+        scratch.execute(sql)
+    # Rows go in before indexes and triggers, so copying them fires nothing
+    for name, sql in tables:
+        if (name, sql) not in virtual:
+            scratch.execute(f'INSERT INTO main."{name}" SELECT * FROM src."{name}" LIMIT ?', (sample_rows,))
+    for type_, name, sql in objects:
+        if type_ in ('index', 'trigger') and not is_shadow(name):
+            scratch.execute(sql)
+    for name, sql in virtual:
+        if 'fts5' in sql.lower():
+            scratch.execute(f'INSERT INTO "{name}" ("{name}") VALUES (\'rebuild\')')
+    scratch.commit()
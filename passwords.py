@@ -0,0 +1,97 @@
+"""Password hashing on a small, bounded worker pool"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Werkzeug's default: scrypt with N=2**15, r=8, p=1 (about 32 MB per hash)
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class HashingUnavailable(Exception):
+    """Raised when a password could not be hashed in time"""
+
+
+class PasswordHasher:
+    """Runs slow KDF hashing on at most `max_workers` threads
+
+    hashlib's scrypt and PBKDF2 release the GIL while they run, so the
+    threads hash in parallel without holding up request threads. At most
+    `max_pending` hashes may be queued or running; beyond that, and when
+    a hash takes longer than `timeout` seconds, `hash` raises
+    HashingUnavailable instead of making the caller wait.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, max_workers=2, max_pending=8, timeout=2.0):
+        """Create a hasher using a werkzeug `method` string such as 'scrypt:32768:8:1'"""
+        if max_workers < 1 or max_pending < max_workers:
+            raise ValueError('Need max_workers >= 1 and max_pending >= max_workers')
+        if method.split(':', 1)[0] not in ('scrypt', 'pbkdf2'):
+            raise ValueError(f'Unsupported password hash method: {method!r}')
+        self.method = method
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.hashed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def hash(self, password):
+        """Return a werkzeug-format hash of `password` or raise HashingUnavailable"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingUnavailable('Too many passwords are being hashed')
+            self._pending += 1
+        try:
+            future = self._get_executor().submit(generate_password_hash, password, self.method)
+        except BaseException:
+            self._finished(None)
+            raise
+        # The slot stays taken until the hash finishes, even if we stop waiting for it
+        future.add_done_callback(self._finished)
+        try:
+            result = future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise HashingUnavailable(f'Hashing took longer than {self.timeout}s') from None
+        with self._lock:
+            self.hashed += 1
+        return result
+
+    @staticmethod
+    def verify(password_hash, password):
+        """Check `password` against a hash produced by `hash`"""
+        return check_password_hash(password_hash, password)
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def in_flight(self):
+        """Number of hashes queued or running"""
+        return self._pending
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='passwords')
+            return self._executor
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads, optionally waiting for running hashes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def after_fork(self):
+        """Drop the executor and pending count inherited from the parent process"""
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
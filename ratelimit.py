@@ -0,0 +1,205 @@
+"""Token-bucket rate limiting for write endpoints"""
+import functools
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(limit):
+    """Turn '5/minute' into (tokens per second, burst); the burst is the count"""
+    count, _, period = limit.partition('/')
+    try:
+        count, seconds = int(count), PERIODS[period.strip().rstrip('s')]
+    except (KeyError, ValueError):
+        raise ValueError(f'Invalid rate limit {limit!r}; expected e.g. "5/minute"') from None
+    if count < 1:
+        raise ValueError(f'Invalid rate limit {limit!r}; count must be positive')
+    return count / seconds, count
+
+
+def _refill(tokens, updated, rate, burst, now):
+    return min(burst, tokens + (now - updated) * rate)
+
+
+class MemoryBackend:
+    """Buckets for one process, spread over lock stripes
+
+    Each bucket is a (tokens, last update, time it will be full) tuple.
+    A bucket that has refilled to its burst is identical to a missing
+    one, so idle buckets are dropped during periodic sweeps of a stripe.
+    """
+
+    def __init__(self, stripes=16, sweep_interval=60.0):
+        """Create `stripes` independently locked bucket tables"""
+        self.sweep_interval = sweep_interval
+        self._stripes = [({}, threading.Lock()) for _ in range(stripes)]
+        self._next_sweep = [time.monotonic() + sweep_interval] * stripes
+
+    def take(self, key, rate, burst):
+        """Take a token; returns 0 if granted, else seconds until one is available"""
+        index = hash(key) % len(self._stripes)
+        buckets, lock = self._stripes[index]
+        now = time.monotonic()
+        with lock:
+            bucket = buckets.get(key)
+            tokens = burst if bucket is None else _refill(bucket[0], bucket[1], rate, burst, now)
+            if now >= self._next_sweep[index]:
+                self._sweep(buckets, now)
+                self._next_sweep[index] = now + self.sweep_interval
+            if tokens < 1:
+                return (1 - tokens) / rate
+            tokens -= 1
+            buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return 0
+
+    @staticmethod
+    def _sweep(buckets, now):
+        for key in [key for key, bucket in buckets.items() if bucket[2] <= now]:
+            del buckets[key]
+
+    def __len__(self):
+        return sum(len(buckets) for buckets, _ in self._stripes)
+
+    def close(self):
+        pass
+
+    def after_fork(self):
+        """Nothing to reset: a forked worker keeps its own copy of the buckets"""
+
+
+class SQLiteBackend:
+    """Buckets in a small SQLite database shared by every worker process
+
+    Keep the file on local disk, or on tmpfs such as /dev/shm; it holds
+    nothing worth keeping across a restart, so it is written without fsync.
+    """
+
+    def __init__(self, path, busy_timeout=1.0, sweep_interval=60.0):
+        """Create the buckets table in `path` if needed"""
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._next_sweep = time.time() + sweep_interval
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    full_at REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rate, burst):
+        """Take a token; returns 0 if granted, else seconds until one is available"""
+        conn = self._connection()
+        # Wall-clock time, since it is compared across processes
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = burst if row is None else _refill(row[0], row[1], rate, burst, now)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+                conn.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                             (key, tokens, now, now + (burst - tokens) / rate))
+            if now >= self._next_sweep:
+                conn.execute('DELETE FROM buckets WHERE full_at <= ?', (now,))
+                self._next_sweep = now + self.sweep_interval
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM buckets').fetchone()[0]
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def after_fork(self):
+        """Open fresh connections in a forked worker"""
+        self._local = threading.local()
+
+
+class RateLimiter:
+    """Per-client and overall token buckets for view functions
+
+    Limits given to `limit` can be overridden per endpoint with the
+    RATE_LIMITS config mapping, e.g. {'contact': {'per_client': '3/minute'}},
+    and RATE_LIMIT_ENABLED = False turns limiting off.
+    """
+
+    def __init__(self, backend=None, app=None):
+        """Create a limiter storing buckets in `backend` (in memory by default)"""
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.rejected = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATE_LIMIT_ENABLED', True)
+        app.config.setdefault('RATE_LIMITS', {})
+        app.extensions['rate_limiter'] = self
+
+    def limit(self, per_client=None, overall=None, methods=('POST',)):
+        """Decorator limiting `methods` on a view, e.g. per_client='5/minute'"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method in methods and current_app.config['RATE_LIMIT_ENABLED']:
+                    self.check(per_client, overall)
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def check(self, per_client=None, overall=None):
+        """Take a token from each applicable bucket or raise 429 with Retry-After"""
+        endpoint = request.endpoint
+        override = current_app.config['RATE_LIMITS'].get(endpoint, {})
+        buckets = (
+            (f'client:{endpoint}:{request.remote_addr}', override.get('per_client', per_client)),
+            (f'overall:{endpoint}', override.get('overall', overall)),
+        )
+        for key, limit in buckets:
+            if not limit:
+                continue
+            rate, burst = parse_limit(limit)
+            wait = self.backend.take(key, rate, burst)
+            if wait:
+                with self._lock:
+                    self.rejected += 1
+                raise TooManyRequests(retry_after=math.ceil(wait))
+
+    def after_fork(self):
+        self.backend.after_fork()
+
+
+def backend_from_env(path=None):
+    """SQLite buckets when RATE_LIMIT_DB names a file, else in-memory ones"""
+    path = path or os.environ.get('RATE_LIMIT_DB')
+    return SQLiteBackend(path) if path else MemoryBackend()
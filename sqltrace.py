@@ -0,0 +1,245 @@
+"""Opt-in SQL tracing: per-statement timing, a slow-query log and per-request query budgets"""
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# Statements worth asking SQLite for a query plan
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+
+class Query:
+    """One traced statement: its text, time taken, rows fetched and VM steps"""
+    
+    __slots__ = ('sql', 'parameters', 'seconds', 'rows', 'steps', 'endpoint', 'path')
+    
+    def __init__(self, sql, parameters, endpoint, path):
+        self.sql = sql
+        self.parameters = parameters
+        self.seconds = 0.0
+        self.rows = 0
+        self.steps = 0
+        self.endpoint = endpoint
+        self.path = path
+    
+    def __repr__(self):
+        return f'<Query {self.seconds * 1000:.2f}ms rows={self.rows} steps={self.steps} {self.sql.strip()[:60]!r}>'
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times its statement, including fetches, when tracing is on"""
+    
+    _query = None
+    
+    def execute(self, sql, parameters=()):
+        tracer = self.connection.tracer
+        if tracer is None:
+            return super().execute(sql, parameters)
+        query = self._query = tracer.start(sql, parameters, self.connection.db_path)
+        steps = self.connection.steps
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            query.seconds += time.perf_counter() - start
+            query.steps += (self.connection.steps - steps) * tracer.step_interval
+            tracer.executed(query)
+    
+    def executemany(self, sql, seq_of_parameters):
+        tracer = self.connection.tracer
+        if tracer is None:
+            return super().executemany(sql, seq_of_parameters)
+        query = self._query = tracer.start(sql, None, self.connection.db_path)
+        steps = self.connection.steps
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query.seconds += time.perf_counter() - start
+            query.steps += (self.connection.steps - steps) * tracer.step_interval
+            query.rows = max(self.rowcount, 0)
+            tracer.executed(query)
+    
+    def _fetched(self, start, steps, rows):
+        query = self._query
+        if query is not None:
+            query.seconds += time.perf_counter() - start
+            query.steps += (self.connection.steps - steps) * self.connection.tracer.step_interval
+            query.rows += rows
+    
+    def fetchone(self):
+        start, steps = time.perf_counter(), self.connection.steps
+        row = super().fetchone()
+        self._fetched(start, steps, row is not None)
+        return row
+    
+    def fetchmany(self, size=None):
+        start, steps = time.perf_counter(), self.connection.steps
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, steps, len(rows))
+        return rows
+    
+    def fetchall(self):
+        start, steps = time.perf_counter(), self.connection.steps
+        rows = super().fetchall()
+        self._fetched(start, steps, len(rows))
+        return rows
+    
+    def __next__(self):
+        start, steps = time.perf_counter(), self.connection.steps
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, steps, 0)
+            raise
+        self._fetched(start, steps, 1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors are TracedCursors; open with sqlite3.connect(factory=...)"""
+    
+    tracer = None
+    db_path = None
+    steps = 0
+    
+    def cursor(self, factory=None):
+        return super().cursor(factory or TracedCursor)
+    
+    # The C implementations of these make a plain cursor, bypassing cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def _count_steps(self):
+        self.steps += 1
+        return 0
+
+
+class QueryTracer:
+    """Records every statement run on connections it is installed on
+    
+    Statements run during a request are collected on flask.g and checked
+    when the request ends: each one slower than `slow_ms` is logged with
+    its EXPLAIN QUERY PLAN, and a request running more than `budget`
+    statements gets a warning naming the statements it repeated, which is
+    how N+1 query patterns show up. Statements outside a request are
+    checked as soon as they have executed.
+    
+    Nothing here runs unless a DatabaseManager is given a tracer, so
+    leaving tracing off costs nothing.
+    """
+    
+    def __init__(self, app=None, slow_ms=50.0, budget=10, step_interval=1000, explain=True):
+        """`step_interval` is how many SQLite VM instructions pass between step counts"""
+        self.slow_seconds = slow_ms / 1000
+        self.budget = budget
+        self.step_interval = step_interval
+        self.explain_plans = explain
+        self.queries = 0
+        self.slow_queries = 0
+        self.over_budget = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Collect statements per request and add a Server-Timing entry for them"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['sql_tracer'] = self
+    
+    def connect(self, db_path, **kwargs):
+        """Open a traced connection; call install() once it is configured"""
+        return sqlite3.connect(db_path, factory=TracedConnection, **kwargs)
+    
+    def install(self, conn, db_path):
+        """Start tracing a connection opened by connect()"""
+        conn.db_path = db_path
+        conn.set_progress_handler(conn._count_steps, self.step_interval)
+        conn.tracer = self
+    
+    def start(self, sql, parameters, db_path):
+        if has_request_context():
+            query = Query(sql, parameters, request.endpoint, db_path)
+            queries = g.get('_sql_queries')
+            if queries is not None:
+                queries.append(query)
+        else:
+            query = Query(sql, parameters, None, db_path)
+        return query
+    
+    def executed(self, query):
+        with self._lock:
+            self.queries += 1
+        if query.endpoint is None and query.seconds >= self.slow_seconds:
+            self._log_slow(query)
+    
+    def _before_request(self):
+        g._sql_queries = []
+    
+    def _after_request(self, response):
+        queries = g.get('_sql_queries')
+        if queries:
+            seconds = sum(query.seconds for query in queries)
+            response.headers.add('Server-Timing', f'sql;dur={seconds * 1000:.2f};desc="{len(queries)} queries"')
+        return response
+    
+    def _teardown_request(self, exc):
+        queries = g.pop('_sql_queries', None)
+        if queries:
+            self.check_request(queries)
+    
+    def check_request(self, queries):
+        """Log slow statements and a budget warning for one request's statements"""
+        for query in queries:
+            if query.seconds >= self.slow_seconds:
+                self._log_slow(query)
+        if len(queries) > self.budget:
+            with self._lock:
+                self.over_budget += 1
+            repeated = [(sql, count) for sql, count in
+                        Counter(' '.join(query.sql.split()) for query in queries).most_common(3) if count > 1]
+            logger.warning('%s ran %d SQL statements (budget %d); most repeated: %s',
+                           queries[0].endpoint, len(queries), self.budget,
+                           '; '.join(f'{count}x {sql[:120]}' for sql, count in repeated) or 'none')
+    
+    def _log_slow(self, query):
+        with self._lock:
+            self.slow_queries += 1
+        plan = self.explain(query) if self.explain_plans else None
+        logger.warning('Slow SQL (%.1f ms, %d rows, ~%d VM steps) in %s: %s%s',
+                       query.seconds * 1000, query.rows, query.steps, query.endpoint or '<no request>',
+                       ' '.join(query.sql.split()),
+                       ''.join(f'\n  {line}' for line in plan) if plan else '')
+    
+    @staticmethod
+    def explain(query):
+        """EXPLAIN QUERY PLAN lines for a query, from a separate read-only connection"""
+        if not query.sql.lstrip().upper().startswith(_EXPLAINABLE) or query.parameters is None:
+            return None
+        try:
+            conn = sqlite3.connect(f'file:{query.path}?mode=ro', uri=True)
+            try:
+                rows = conn.execute(f'EXPLAIN QUERY PLAN {query.sql}', query.parameters).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            return [f'(no plan: {e})']
+        return [f"{'  ' * _depth(rows, row)}{row[-1]}" for row in rows]
+
+
+def _depth(rows, row):
+    parents = {r[0]: r[1] for r in rows}
+    depth, parent = 0, row[1]
+    while parent in parents:
+        depth, parent = depth + 1, parents[parent]
+    return depth
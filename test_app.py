@@ -8,7 +8,9 @@ import sys
 # Add the current directory to the path so we can import our modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db_manager
+from app import app, contact_writer, db_manager, password_hasher
+from passwords import HashingUnavailable, PasswordHasher
+from DAL import Project, SearchResult
 
 class TestFlaskApp(unittest.TestCase):
     """Test cases for the Flask application"""
@@ -34,6 +36,13 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'<!DOCTYPE html>', response.data)
     
+    def test_home_route_is_cached(self):
+        """Test that repeat visits to a static page are served from the page cache"""
+        self.client.get('/')
+        response = self.client.get('/')
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+        self.assertIn(b'<!DOCTYPE html>', response.data)
+    
     def test_about_route(self):
         """Test the about page route"""
         response = self.client.get('/about')
@@ -52,6 +61,126 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'<!DOCTYPE html>', response.data)
     
+    def test_projects_not_modified_skips_query(self):
+        """Test that a matching ETag answers /projects without querying the listing"""
+        etag = self.client.get('/projects').headers['ETag']
+        
+        with patch('app.db_manager.get_projects_page') as mock_page:
+            response = self.client.get('/projects', headers={'If-None-Match': etag})
+        
+        self.assertEqual(response.status_code, 304)
+        mock_page.assert_not_called()
+    
+    def test_projects_etag_changes_with_version(self):
+        """Test that a projects write invalidates the listing ETag"""
+        with patch('app.db_manager.get_projects_version', return_value=(1, '2025-10-17 19:18:01')):
+            first = self.client.get('/projects').headers['ETag']
+        with patch('app.db_manager.get_projects_version', return_value=(2, '2025-10-17 19:18:01')):
+            second = self.client.get('/projects').headers['ETag']
+        
+        self.assertNotEqual(first, second)
+    
+    def test_projects_pagination_links(self):
+        """Test that the projects page links to the next page when there is one"""
+        projects = [Project(i, f'Project {i}', 'Description', 'image.jpg', '2025-10-17 19:12:08')
+                    for i in range(3)]
+        with patch('app.db_manager.get_projects_page') as mock_page:
+            mock_page.return_value = (projects, 'next-cursor', 'prev-cursor')
+            response = self.client.get('/projects?after=abc')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'after=next-cursor', response.data)
+        self.assertIn(b'before=prev-cursor', response.data)
+        mock_page.assert_called_once_with(after='abc', before=None, limit=20)
+    
+    def test_projects_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get('/projects?after=%25%25%25')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_search_route_highlights_matches(self):
+        """Test that search results are rendered with escaped, highlighted text"""
+        results = [SearchResult(1, 'Vehicle <App>', 'About a vehicle', 'v.jpg', '2025-10-17 19:12:08',
+                                '\x02Vehicle\x03 <App>', 'About a \x02vehicle\x03')]
+        with patch('app.db_manager.search_projects') as mock_search:
+            mock_search.return_value = results
+            response = self.client.get('/projects/search?q=vehicle')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'<mark>Vehicle</mark> &lt;App&gt;', response.data)
+        mock_search.assert_called_once_with('vehicle', limit=20)
+    
+    def test_search_route_without_query(self):
+        """Test that the search page renders a form when no query is given"""
+        response = self.client.get('/projects/search')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'name="q"', response.data)
+    
+    def test_api_projects_page(self):
+        """Test that the JSON API returns a page of projects and its cursors"""
+        projects = [Project(i, f'Project {i}', 'Description', 'image.jpg', '2025-10-17 19:12:08')
+                    for i in range(2)]
+        with patch('app.db_manager.get_projects_page') as mock_page:
+            mock_page.return_value = (projects, 'next-cursor', None)
+            response = self.client.get('/api/projects?after=abc&limit=2')
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['next_cursor'], 'next-cursor')
+        self.assertIsNone(data['prev_cursor'])
+        self.assertEqual([p['title'] for p in data['projects']], ['Project 0', 'Project 1'])
+        self.assertNotIn('updated_at', data['projects'][0])
+        self.assertIn('ETag', response.headers)
+        mock_page.assert_called_once_with(after='abc', before=None, limit=2)
+    
+    def test_api_projects_field_selection(self):
+        """Test that ?fields= limits each project to the named fields"""
+        projects = [Project(1, 'Project', 'Description', 'image.jpg', '2025-10-17 19:12:08')]
+        with patch('app.db_manager.get_projects_page', return_value=(projects, None, None)):
+            response = self.client.get('/api/projects?fields=id,title')
+        
+        self.assertEqual(response.get_json()['projects'], [{'id': 1, 'title': 'Project'}])
+    
+    def test_api_projects_rejects_bad_arguments(self):
+        """Test that unknown fields, bad limits and bad cursors are JSON 400s"""
+        for query in ('fields=id,password', 'limit=0', 'limit=1000', 'after=%25%25%25'):
+            response = self.client.get(f'/api/projects?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('error', response.get_json())
+    
+    def test_api_projects_not_modified(self):
+        """Test that a matching ETag answers the JSON API without querying the listing"""
+        etag = self.client.get('/api/projects').headers['ETag']
+        
+        with patch('app.db_manager.get_projects_page') as mock_page:
+            response = self.client.get('/api/projects', headers={'If-None-Match': etag})
+        
+        self.assertEqual(response.status_code, 304)
+        mock_page.assert_not_called()
+    
+    def test_api_projects_ndjson_streams_every_project(self):
+        """Test that the NDJSON export streams one object per line in batches"""
+        projects = [Project(i, f'Project {i}', 'Description', 'image.jpg', '2025-10-17 19:12:08')
+                    for i in range(1, 6)]
+        self.app.config['API_STREAM_BATCH_SIZE'] = 2
+        try:
+            with patch('app.db_manager.iter_projects', return_value=iter(projects)) as mock_iter:
+                response = self.client.get('/api/projects.ndjson?fields=id,title&after_id=3')
+                lines = response.data.decode().splitlines()
+        finally:
+            self.app.config['API_STREAM_BATCH_SIZE'] = 1000
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in lines],
+                         [{'id': i, 'title': f'Project {i}'} for i in range(1, 6)])
+        mock_iter.assert_called_once_with(2, after_id=3)
+    
+    def test_api_projects_ndjson_rejects_unknown_fields(self):
+        """Test that the NDJSON export validates fields before streaming"""
+        response = self.client.get('/api/projects.ndjson?fields=nope')
+        self.assertEqual(response.status_code, 400)
+    
     def test_contact_get_route(self):
         """Test the contact page GET route"""
         response = self.client.get('/contact')
@@ -71,6 +200,43 @@ class TestFlaskApp(unittest.TestCase):
         response = self.client.post('/contact', data=data, follow_redirects=True)
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Thank you for your message!', response.data)
+        
+        contact_writer.close()
+        latest = db_manager.get_contact_messages(limit=1)[0]
+        self.assertEqual(latest[1:5], ('John', 'Doe', 'john.doe@example.com', 'This is a test message'))
+        self.assertTrue(PasswordHasher.verify(latest[6], 'password123'))
+    
+    def test_contact_post_when_queue_is_full(self):
+        """Test that a full write queue answers 503 instead of blocking"""
+        data = {
+            'firstName': 'John',
+            'lastName': 'Doe',
+            'email': 'john.doe@example.com',
+            'password': 'password123',
+            'confirmPassword': 'password123',
+            'message': 'This is a test message'
+        }
+        with patch.object(contact_writer, 'submit', return_value=False):
+            response = self.client.post('/contact', data=data)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '60')
+        self.assertIn(b'Please try again', response.data)
+    
+    def test_contact_post_when_hashing_is_busy(self):
+        """Test that a saturated password hasher answers 503"""
+        data = {
+            'firstName': 'John',
+            'lastName': 'Doe',
+            'email': 'john.doe@example.com',
+            'password': 'password123',
+            'confirmPassword': 'password123',
+            'message': 'This is a test message'
+        }
+        with patch.object(password_hasher, 'hash', side_effect=HashingUnavailable('busy')), \
+                patch.object(contact_writer, 'submit') as submit:
+            response = self.client.post('/contact', data=data)
+        self.assertEqual(response.status_code, 503)
+        submit.assert_not_called()
     
     def test_contact_post_invalid_data(self):
         """Test contact form with invalid data"""
@@ -86,6 +252,18 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Please enter a valid first name', response.data)
     
+    def test_contact_post_is_rate_limited(self):
+        """Test that too many contact posts from one client get 429"""
+        self.app.config['RATE_LIMITS'] = {'contact': {'per_client': '1/hour'}}
+        try:
+            environ = {'REMOTE_ADDR': '192.0.2.1'}
+            self.client.post('/contact', data={}, environ_base=environ)
+            response = self.client.post('/contact', data={}, environ_base=environ)
+        finally:
+            self.app.config['RATE_LIMITS'] = {}
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+    
     def test_add_project_get_route(self):
         """Test the add project page GET route"""
         response = self.client.get('/add_project')
@@ -130,6 +308,15 @@ class TestFlaskApp(unittest.TestCase):
         # The file might not exist, but the route should be accessible
         self.assertIn(response.status_code, [200, 404])
     
+    def test_metrics_route(self):
+        """Test that the metrics endpoint reports route latency and cache counters"""
+        self.client.get('/about')
+        response = self.client.get('/metrics')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds_count{endpoint="about"}', response.data)
+        self.assertIn(b'page_cache_hits_total', response.data)
+    
     def test_app_initialization(self):
         """Test that the app initializes correctly"""
         self.assertIsNotNone(self.app)
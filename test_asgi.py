@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db_manager
+from asgi import application, wsgi_environ
+
+def request(method, path, query=b'', body=b'', headers=()):
+    """Send one request through the ASGI application and collect the response"""
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query,
+        'root_path': '', 'scheme': 'http', 'http_version': '1.1',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    incoming = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        return incoming.pop(0)
+    
+    async def send(message):
+        sent.append(message)
+    
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    headers = {name.decode(): value.decode() for name, value in start['headers']}
+    return start['status'], headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+class TestASGI(unittest.TestCase):
+    """Test cases for the ASGI entry point"""
+    
+    def setUp(self):
+        """Set up a WSGI test client to compare against"""
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+    
+    def test_projects_match_wsgi(self):
+        """Test that the prefetched, inline projects page is the WSGI page"""
+        with patch.object(application, '_run_threaded', side_effect=AssertionError('ran threaded')):
+            status, headers, body = request('GET', '/projects')
+        expected = self.client.get('/projects')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, expected.data)
+        self.assertEqual(headers['etag'], expected.headers['ETag'])
+    
+    def test_inline_view_never_queries_on_the_loop(self):
+        """Test that with the cache bypassed the inline view is served what was prefetched"""
+        threads = []
+        load_page, load_version = db_manager._load_projects_page, db_manager._load_projects_version
+        
+        def record(loader):
+            def load(*args):
+                threads.append(threading.current_thread().name)
+                return loader(*args)
+            return load
+        
+        with patch.object(db_manager, '_sync_data_version', return_value=False), \
+                patch.object(db_manager, '_load_projects_page', record(load_page)), \
+                patch.object(db_manager, '_load_projects_version', record(load_version)):
+            status, _, body = request('GET', '/projects')
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(all(name.startswith('dal') for name in threads), threads)
+    
+    def test_conditional_get_and_bad_cursor(self):
+        """Test 304s and 400s from inline routes"""
+        _, headers, _ = request('GET', '/projects/search', b'q=website')
+        status, _, body = request('GET', '/projects/search', b'q=website',
+                                  headers=[(b'if-none-match', headers['etag'].encode())])
+        self.assertEqual((status, body), (304, b''))
+        self.assertEqual(request('GET', '/projects', b'after=not-a-cursor')[0], 400)
+    
+    def test_form_post_runs_threaded(self):
+        """Test that posts go through the thread pool with their body intact"""
+        body = b'title=A&description=B&imageFileName='
+        with patch.object(application, '_run_inline', side_effect=AssertionError('ran inline')):
+            status, _, page = request('POST', '/add_project', body=body, headers=[
+                (b'content-type', b'application/x-www-form-urlencoded')])
+        self.assertEqual(status, 200)
+        self.assertIn(b'Please enter a valid project title', page)
+    
+    def test_wsgi_environ_headers(self):
+        """Test header folding and content headers in the environ"""
+        environ = wsgi_environ({
+            'method': 'GET', 'path': '/café', 'query_string': b'a=1',
+            'headers': [(b'accept', b'text/html'), (b'accept', b'*/*'), (b'content-type', b'text/plain')],
+        }, b'')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['PATH_INFO'], '/café'.encode('utf-8').decode('latin-1'))
+
+if __name__ == '__main__':
+    unittest.main()
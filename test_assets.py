@@ -0,0 +1,127 @@
+import unittest
+import os
+import json
+import tempfile
+import sys
+
+from flask import Flask, url_for
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from assets import AssetManifest, build_assets, CRITICAL_NAME, OUTPUT_DIR, MANIFEST_NAME
+from critical_css import minify_css
+
+CSS = b'body { color: red; }\n' * 200
+
+class TestAssetPipeline(unittest.TestCase):
+    """Test cases for the fingerprinted static asset pipeline"""
+    
+    def setUp(self):
+        """Set up a static folder with a stylesheet and an image"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, 'static')
+        os.makedirs(os.path.join(self.static, 'css'))
+        os.makedirs(os.path.join(self.static, 'images'))
+        with open(os.path.join(self.static, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        with open(os.path.join(self.static, 'images', 'photo.png'), 'wb') as f:
+            f.write(b'\x89PNG not really')
+    
+    def tearDown(self):
+        """Clean up the static folder"""
+        self.tmp.cleanup()
+    
+    def make_app(self):
+        app = Flask(__name__, static_folder=None)
+        app.static_folder = self.static
+        assets = AssetManifest(app)
+        app.add_url_rule('/static/<path:filename>', 'static', assets.send)
+        return app
+    
+    def test_build_writes_hashed_files_and_manifest(self):
+        """Test that every file gets a content-hashed copy and compressible ones get variants"""
+        manifest = build_assets(self.static)
+        
+        css = manifest['css/site.css']
+        self.assertRegex(css, r'^dist/css/site\.[0-9a-f]{12}\.css$')
+        self.assertTrue(os.path.isfile(os.path.join(self.static, css + '.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self.static, manifest['images/photo.png'] + '.gz')))
+        with open(os.path.join(self.static, OUTPUT_DIR, MANIFEST_NAME)) as f:
+            self.assertEqual(json.load(f), manifest)
+    
+    def test_rebuild_is_stable(self):
+        """Test that rebuilding unchanged sources gives the same names"""
+        first = build_assets(self.static)
+        second = build_assets(self.static)
+        self.assertEqual(first, second)
+    
+    def test_url_for_resolves_through_manifest(self):
+        """Test that url_for('static') points at the fingerprinted file once built"""
+        manifest = build_assets(self.static)
+        app = self.make_app()
+        
+        with app.test_request_context():
+            self.assertEqual(url_for('static', filename='css/site.css'), '/static/' + manifest['css/site.css'])
+            self.assertEqual(url_for('static', filename='other.css'), '/static/other.css')
+    
+    def test_serves_precompressed_variant(self):
+        """Test Accept-Encoding negotiation and immutable caching"""
+        manifest = build_assets(self.static)
+        client = self.make_app().test_client()
+        url = '/static/' + manifest['css/site.css']
+        
+        gzipped = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+        
+        self.assertEqual(gzipped.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzipped.mimetype, 'text/css')
+        self.assertLess(len(gzipped.data), len(CSS))
+        self.assertIn('immutable', gzipped.headers['Cache-Control'])
+        self.assertIn('Accept-Encoding', gzipped.headers['Vary'])
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.data, minify_css(CSS.decode()).encode())
+        gzipped.close()
+        plain.close()
+    
+    def test_build_minifies_stylesheets(self):
+        """Test that fingerprinted stylesheets are minified and named by their minified content"""
+        manifest = build_assets(self.static)
+        
+        with open(os.path.join(self.static, manifest['css/site.css']), 'rb') as f:
+            self.assertEqual(f.read(), b'body{color:red}' * 200)
+    
+    def test_stylesheet_is_async_when_critical_css_is_inlined(self):
+        """Test that pages with critical CSS inline it and preload the full stylesheet"""
+        manifest = build_assets(self.static)
+        with open(os.path.join(self.static, OUTPUT_DIR, CRITICAL_NAME), 'w') as f:
+            json.dump({'inlined': 'body{color:red}'}, f)
+        app = self.make_app()
+        
+        @app.route('/inlined')
+        def inlined():
+            return app.jinja_env.from_string("{{ critical_css() }}{{ stylesheet('css/site.css') }}").render()
+        
+        @app.route('/blocking')
+        def blocking():
+            return app.jinja_env.from_string("{{ critical_css() }}{{ stylesheet('css/site.css') }}").render()
+        
+        client = app.test_client()
+        href = '/static/' + manifest['css/site.css']
+        page = client.get('/inlined').get_data(as_text=True)
+        self.assertTrue(page.startswith('<style>body{color:red}</style>'))
+        self.assertIn(f'<link rel="preload" href="{href}" as="style"', page)
+        self.assertIn(f'<noscript><link rel="stylesheet" href="{href}"></noscript>', page)
+        self.assertEqual(client.get('/blocking').get_data(as_text=True), f'<link rel="stylesheet" href="{href}">')
+    
+    def test_unbuilt_files_served_normally(self):
+        """Test that files without a build are served without immutable caching"""
+        client = self.make_app().test_client()
+        response = client.get('/static/css/site.css')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response.headers.get('Cache-Control', ''))
+        response.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import os
+import json
+import tempfile
+import sys
+
+from flask import Flask
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from DAL import DatabaseManager, SCHEMA_VERSION
+from cli import register_commands
+
+class TestProjectCommands(unittest.TestCase):
+    """Test cases for the `flask projects` CLI commands"""
+    
+    def setUp(self):
+        """Set up an app with its own temporary database"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.tmp.name, 'projects.db'))
+        self.app = Flask(__name__)
+        register_commands(self.app, self.db_manager)
+        self.runner = self.app.test_cli_runner()
+    
+    def tearDown(self):
+        """Clean up the temporary database"""
+        self.db_manager.close()
+        self.tmp.cleanup()
+    
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+    
+    def test_import_csv(self):
+        """Test importing projects from a CSV file"""
+        with open(self.path('in.csv'), 'w') as f:
+            f.write('title,description,image_file_name\n')
+            f.write('Project 1,"Description, with comma",img1.jpg\n')
+            f.write('Project 2,Description 2,img2.jpg\n')
+        
+        result = self.runner.invoke(args=['projects', 'import', self.path('in.csv')])
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Imported 2 rows', result.output)
+        titles = sorted(p.title for p in self.db_manager.get_all_projects())
+        self.assertEqual(titles, ['Project 1', 'Project 2'])
+    
+    def test_import_reports_missing_column(self):
+        """Test that a row without a required column fails cleanly"""
+        with open(self.path('in.ndjson'), 'w') as f:
+            f.write(json.dumps({'title': 'Project 1', 'description': 'Description'}) + '\n')
+        
+        result = self.runner.invoke(args=['projects', 'import', self.path('in.ndjson')])
+        
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("missing required column 'image_file_name'", result.output)
+    
+    def test_export_import_round_trip(self):
+        """Test exporting to NDJSON and importing the file back"""
+        self.db_manager.add_project('Project 1', 'Description 1', 'img1.jpg')
+        self.db_manager.add_project('Project 2', 'Description 2', 'img2.jpg')
+        
+        result = self.runner.invoke(args=['projects', 'export', self.path('out.ndjson')])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(self.path('out.ndjson')) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['title'] for row in rows], ['Project 1', 'Project 2'])
+        
+        result = self.runner.invoke(args=['projects', 'import', '--format', 'ndjson', self.path('out.ndjson')])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(self.db_manager.get_all_projects()), 4)
+    
+    def test_unknown_extension_needs_format(self):
+        """Test that the format must be given when the extension doesn't say"""
+        result = self.runner.invoke(args=['projects', 'export', self.path('out.txt')])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn('--format', result.output)
+    
+    def test_db_status_dry_run_and_migrate(self):
+        """Test that `flask db` reports, estimates and then applies pending migrations"""
+        result = self.runner.invoke(args=['db', 'status'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn(f'Schema version 0 of {SCHEMA_VERSION}', result.output)
+        self.assertIn('pending 1:', result.output)
+        
+        result = self.runner.invoke(args=['db', 'migrate', '--dry-run'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn(f'{SCHEMA_VERSION} pending migrations', result.output)
+        self.assertEqual(self.db_manager.schema_version(), 0)
+        
+        result = self.runner.invoke(args=['db', 'migrate'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.db_manager.schema_version(), SCHEMA_VERSION)
+        self.assertIn('0 pending migrations', self.runner.invoke(args=['db', 'migrate', '--dry-run']).output)
+    
+    def test_templates_compile_fills_bytecode_cache(self):
+        """Test that `flask templates compile` writes bytecode for every template"""
+        from jinja2 import DictLoader, FileSystemBytecodeCache
+        cache_dir = self.path('jinja-cache')
+        os.mkdir(cache_dir)
+        self.app.jinja_loader = DictLoader({'a.html': '{{ 1 + 1 }}', 'b.html': '{% include "a.html" %}'})
+        self.app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        
+        result = self.runner.invoke(args=['templates', 'compile'])
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Compiled 2 templates', result.output)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
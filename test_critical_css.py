@@ -0,0 +1,84 @@
+import unittest
+import os
+import tempfile
+import sys
+
+from flask import Flask, render_template_string, url_for
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from critical_css import critical_rules, extract_critical_css, minify_css
+
+CSS = """
+@import url('https://fonts.example.com/css?family=Sans');
+/* Base */
+:root { --accent: #0ff; }
+body { font-family: 'Open Sans', sans-serif; }
+header .logo { animation: glow 2s infinite; }
+.hero h1 { font-size: 3rem; }
+.hero h1:hover { color: var(--accent); }
+.footer-links a { color: gray; }
+.card, .unused { padding: 1rem; }
+@keyframes glow { 0%, 100% { opacity: 1; } 50% { opacity: 0.5; } }
+@keyframes float { from { top: 0; } to { top: 10px; } }
+@media (max-width: 768px) {
+    .hero h1 { font-size: 2rem; }
+    .unused { display: none; }
+}
+"""
+
+class TestCriticalCss(unittest.TestCase):
+    """Test cases for critical CSS extraction and CSS minification"""
+    
+    def test_minify_keeps_strings(self):
+        """Test that whitespace and comments go but quoted strings are untouched"""
+        css = "/* note */\na  >  b { content: ' a  ;  b ' ;\n  color : red ; }\n.x :hover { top: 0 }"
+        
+        self.assertEqual(minify_css(css), "a>b{content:' a  ;  b ';color:red}.x :hover{top:0}")
+    
+    def test_critical_rules_match_page_tokens(self):
+        """Test that rules for elements on the page are kept, and states and unused rules dropped"""
+        css = critical_rules(CSS, {'body', 'header', 'main', 'h1', '.logo', '.hero', '.card'})
+        
+        self.assertIn(':root{--accent:#0ff}', css)
+        self.assertIn("body{font-family:'Open Sans',sans-serif}", css)
+        self.assertIn('.hero h1{font-size:3rem}', css)
+        self.assertIn('.card{padding:1rem}', css)
+        self.assertIn('@media (max-width: 768px){.hero h1{font-size:2rem}}', css)
+        self.assertIn('@keyframes glow', css)
+        for dropped in ('@import', ':hover', '.footer-links', '.unused', '@keyframes float'):
+            self.assertNotIn(dropped, css)
+    
+    def test_extract_renders_each_page(self):
+        """Test that every argument-free HTML page gets the rules for its first screen"""
+        with tempfile.TemporaryDirectory() as static:
+            with open(os.path.join(static, 'site.css'), 'w') as f:
+                f.write(CSS)
+            app = Flask(__name__, static_folder=static)
+            page = ("<link rel='stylesheet' href='{{ url_for('static', filename='site.css') }}'>"
+                    "<header><a class='logo'>Home</a></header><main>MAIN</main>"
+                    "<footer class='footer-links'><a>Email</a></footer>")
+            
+            @app.route('/')
+            def home():
+                return render_template_string(page.replace('MAIN', "<section class='hero'><h1>Hi</h1></section>"))
+            
+            @app.route('/long')
+            def long():
+                return render_template_string(page.replace('MAIN', '<p></p>' * 5 + "<div class='card'></div>"))
+            
+            app.add_url_rule('/api', 'api', lambda: {'ok': True})
+            app.add_url_rule('/item/<int:item_id>', 'item', lambda item_id: '')
+            
+            critical = extract_critical_css(app, fold_elements=3)
+        
+        self.assertEqual(sorted(critical), ['home', 'long'])
+        self.assertIn('.hero h1{font-size:3rem}', critical['home'])
+        self.assertIn('@keyframes glow', critical['home'])
+        self.assertNotIn('.footer-links', critical['home'])
+        # The card is below the fold
+        self.assertNotIn('.card', critical['long'])
+
+if __name__ == '__main__':
+    unittest.main()
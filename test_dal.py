@@ -1,13 +1,18 @@
+import asyncio
 import unittest
 import os
 import tempfile
 import sqlite3
 import sys
+import threading
+from datetime import datetime
 
 # Add the current directory to the path so we can import our modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from DAL import DatabaseManager
+from DAL import (AsyncDatabaseManager, DatabaseManager, Project, ProjectColumns, QueryCache,
+                 SCHEMA_VERSION, SearchResult, decode_cursor, encode_cursor, HIGHLIGHT_START,
+                 HIGHLIGHT_END)
 
 class TestDatabaseManager(unittest.TestCase):
     """Test cases for the DatabaseManager class"""
@@ -20,6 +25,7 @@ class TestDatabaseManager(unittest.TestCase):
         
     def tearDown(self):
         """Clean up test database"""
+        self.db_manager.close()
         os.close(self.db_fd)
         os.unlink(self.db_path)
     
@@ -38,6 +44,42 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertIsNotNone(table_exists)
         self.assertEqual(table_exists[0], 'projects')
     
+    def test_schema_is_created_on_first_use(self):
+        """Test that constructing a manager opens nothing until the database is used"""
+        db_manager = DatabaseManager(self.db_path + '-lazy')
+        try:
+            self.assertFalse(os.path.exists(self.db_path + '-lazy'))
+            self.assertEqual(db_manager.get_all_projects(), [])
+            
+            conn = sqlite3.connect(self.db_path + '-lazy')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            conn.close()
+            self.assertEqual(version, SCHEMA_VERSION)
+        finally:
+            db_manager.close()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.db_path + '-lazy' + suffix):
+                    os.unlink(self.db_path + '-lazy' + suffix)
+    
+    def test_current_schema_skips_ddl(self):
+        """Test that a database already at SCHEMA_VERSION is not rebuilt on startup"""
+        self.db_manager.ensure_schema()
+        conn = self.db_manager.get_connection()
+        conn.execute('DROP INDEX idx_projects_created_at_id')
+        conn.commit()
+        conn.close()
+        
+        reopened = DatabaseManager(self.db_path)
+        try:
+            reopened.ensure_schema()
+            self.assertEqual(reopened.fts_enabled, self.db_manager.fts_enabled)
+            conn = reopened.get_connection()
+            index = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_projects_created_at_id'").fetchone()
+            conn.close()
+            self.assertIsNone(index)
+        finally:
+            reopened.close()
+    
     def test_add_project(self):
         """Test adding a new project"""
         title = "Test Project"
@@ -53,9 +95,9 @@ class TestDatabaseManager(unittest.TestCase):
         # Verify the project was actually added
         project = self.db_manager.get_project_by_id(project_id)
         self.assertIsNotNone(project)
-        self.assertEqual(project[1], title)  # title is at index 1
-        self.assertEqual(project[2], description)  # description is at index 2
-        self.assertEqual(project[3], image_file_name)  # image_file_name is at index 3
+        self.assertEqual(project.title, title)
+        self.assertEqual(project.description, description)
+        self.assertEqual(project.image_file_name, image_file_name)
     
     def test_get_all_projects(self):
         """Test retrieving all projects"""
@@ -71,9 +113,9 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertEqual(len(projects), 3)
         
         # Check that projects are ordered by created_at DESC (newest first)
-        self.assertEqual(projects[0][1], "Project 3")  # Most recent
-        self.assertEqual(projects[1][1], "Project 2")
-        self.assertEqual(projects[2][1], "Project 1")  # Oldest
+        self.assertEqual(projects[0].title, "Project 3")  # Most recent
+        self.assertEqual(projects[1].title, "Project 2")
+        self.assertEqual(projects[2].title, "Project 1")  # Oldest
     
     def test_get_project_by_id(self):
         """Test retrieving a specific project by ID"""
@@ -85,10 +127,10 @@ class TestDatabaseManager(unittest.TestCase):
         
         # Check that the correct project was retrieved
         self.assertIsNotNone(project)
-        self.assertEqual(project[0], project_id)  # ID
-        self.assertEqual(project[1], "Test Project")  # title
-        self.assertEqual(project[2], "Test Description")  # description
-        self.assertEqual(project[3], "test.jpg")  # image_file_name
+        self.assertEqual(project.id, project_id)
+        self.assertEqual(project.title, "Test Project")
+        self.assertEqual(project.description, "Test Description")
+        self.assertEqual(project.image_file_name, "test.jpg")
     
     def test_get_nonexistent_project(self):
         """Test retrieving a project that doesn't exist"""
@@ -112,9 +154,9 @@ class TestDatabaseManager(unittest.TestCase):
         
         # Verify the project was updated
         project = self.db_manager.get_project_by_id(project_id)
-        self.assertEqual(project[1], new_title)
-        self.assertEqual(project[2], new_description)
-        self.assertEqual(project[3], new_image)
+        self.assertEqual(project.title, new_title)
+        self.assertEqual(project.description, new_description)
+        self.assertEqual(project.image_file_name, new_image)
     
     def test_update_nonexistent_project(self):
         """Test updating a project that doesn't exist"""
@@ -180,11 +222,408 @@ class TestDatabaseManager(unittest.TestCase):
         # Check final state
         projects = self.db_manager.get_all_projects()
         self.assertEqual(len(projects), 1)
-        self.assertEqual(projects[0][1], "Updated Project 1")
+        self.assertEqual(projects[0].title, "Updated Project 1")
         
         # Check that deleted project doesn't exist
         self.assertFalse(self.db_manager.project_exists(id2))
         self.assertTrue(self.db_manager.project_exists(id1))
 
+    def test_wal_mode_and_pragmas(self):
+        """Test that connections use WAL journaling and a busy timeout"""
+        with self.db_manager.connection() as conn:
+            journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+            synchronous = conn.execute('PRAGMA synchronous').fetchone()[0]
+            busy_timeout = conn.execute('PRAGMA busy_timeout').fetchone()[0]
+        
+        self.assertEqual(journal_mode, 'wal')
+        self.assertEqual(synchronous, 1)  # NORMAL
+        self.assertEqual(busy_timeout, 5000)
+    
+    def test_pool_reuses_connection_within_thread(self):
+        """Test that nested checkouts on one thread share a connection"""
+        with self.db_manager.connection() as outer:
+            with self.db_manager.connection() as inner:
+                self.assertIs(outer, inner)
+        
+        with self.db_manager.connection() as again:
+            self.assertIs(outer, again)
+    
+    def test_pool_size_is_bounded(self):
+        """Test that concurrent threads never open more than pool_size connections"""
+        manager = DatabaseManager(self.db_path, pool_size=2)
+        manager.add_project("Project 1", "Description 1", "img1.jpg")
+        barrier = threading.Barrier(4)
+        seen = set()
+        
+        def reader():
+            barrier.wait()
+            for _ in range(20):
+                with manager.connection() as conn:
+                    seen.add(id(conn))
+                    conn.execute('SELECT * FROM projects').fetchall()
+        
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        manager.close()
+        
+        self.assertLessEqual(len(seen), 2)
+    
+    def test_failed_write_is_rolled_back(self):
+        """Test that a connection is returned to the pool without a dangling transaction"""
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.add_project(None, "Description", "image.jpg")
+        
+        with self.db_manager.write_connection() as conn:
+            self.assertFalse(conn.in_transaction)
+        self.assertEqual(len(self.db_manager.get_all_projects()), 0)
+
+    def test_listing_is_served_from_cache(self):
+        """Test that repeated listings hit the cache"""
+        self.db_manager.add_project("Project 1", "Description 1", "img1.jpg")
+        self.db_manager.get_all_projects()
+        hits = self.db_manager.cache.hits
+        
+        projects = self.db_manager.get_all_projects()
+        
+        self.assertEqual(self.db_manager.cache.hits, hits + 1)
+        self.assertEqual(len(projects), 1)
+    
+    def test_writes_invalidate_cache_precisely(self):
+        """Test that a write drops listings and its own project but keeps other lookups"""
+        id1 = self.db_manager.add_project("Project 1", "Description 1", "img1.jpg")
+        id2 = self.db_manager.add_project("Project 2", "Description 2", "img2.jpg")
+        self.db_manager.get_all_projects()
+        self.db_manager.get_project_by_id(id1)
+        self.db_manager.get_project_by_id(id2)
+        
+        self.db_manager.update_project(id1, "Renamed", "Description 1", "img1.jpg")
+        hits = self.db_manager.cache.hits
+        
+        self.assertEqual(self.db_manager.get_project_by_id(id1).title, "Renamed")
+        self.assertEqual(self.db_manager.cache.hits, hits)
+        self.db_manager.get_project_by_id(id2)
+        self.assertEqual(self.db_manager.cache.hits, hits + 1)
+        self.assertIn("Renamed", [project.title for project in self.db_manager.get_all_projects()])
+    
+    def test_cached_missing_project_is_invalidated_by_add(self):
+        """Test that a cached negative lookup does not outlive the insert"""
+        self.assertFalse(self.db_manager.project_exists(1))
+        project_id = self.db_manager.add_project("Project 1", "Description 1", "img1.jpg")
+        self.assertEqual(project_id, 1)
+        self.assertTrue(self.db_manager.project_exists(1))
+    
+    def test_cache_detects_writes_from_other_connections(self):
+        """Test that commits by another manager (e.g. another worker process) clear the cache"""
+        other = DatabaseManager(self.db_path)
+        self.assertEqual(len(self.db_manager.get_all_projects()), 0)
+        
+        other.add_project("Elsewhere", "Written by another worker", "img.jpg")
+        other.close()
+        
+        self.assertEqual(len(self.db_manager.get_all_projects()), 1)
+    
+    def test_cache_disabled(self):
+        """Test that a zero TTL disables caching"""
+        manager = DatabaseManager(self.db_path, cache_ttl=0)
+        self.assertIsNone(manager.cache)
+        manager.add_project("Project 1", "Description 1", "img1.jpg")
+        self.assertEqual(len(manager.get_all_projects()), 1)
+        manager.close()
+    def test_listing_index_created(self):
+        """Test that init_database creates the index backing the listing order"""
+        with self.db_manager.connection() as conn:
+            plan = conn.execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM projects ORDER BY created_at DESC, id DESC'
+            ).fetchall()
+        
+        self.assertIn('idx_projects_created_at_id', plan[0][3])
+        self.assertNotIn('TEMP B-TREE', ' '.join(row[3] for row in plan))
+    
+    def test_projects_page_walk(self):
+        """Test walking forward and back through keyset pages"""
+        for i in range(5):
+            self.db_manager.add_project(f"Project {i}", "Description", "image.jpg")
+        
+        page1, next1, prev1 = self.db_manager.get_projects_page(limit=2)
+        self.assertEqual([p.title for p in page1], ["Project 4", "Project 3"])
+        self.assertIsNone(prev1)
+        
+        page2, next2, prev2 = self.db_manager.get_projects_page(after=next1, limit=2)
+        self.assertEqual([p.title for p in page2], ["Project 2", "Project 1"])
+        
+        page3, next3, prev3 = self.db_manager.get_projects_page(after=next2, limit=2)
+        self.assertEqual([p.title for p in page3], ["Project 0"])
+        self.assertIsNone(next3)
+        
+        back, back_next, _ = self.db_manager.get_projects_page(before=prev3, limit=2)
+        self.assertEqual([p.title for p in back], ["Project 2", "Project 1"])
+        self.assertEqual(back_next, next2)
+        
+        first, _, first_prev = self.db_manager.get_projects_page(before=prev2, limit=2)
+        self.assertEqual(first, page1)
+        self.assertIsNone(first_prev)
+    
+    def test_projects_page_sees_new_projects(self):
+        """Test that adding a project invalidates cached pages"""
+        self.db_manager.add_project("Project 1", "Description", "image.jpg")
+        self.assertEqual(len(self.db_manager.get_projects_page()[0]), 1)
+        self.db_manager.add_project("Project 2", "Description", "image.jpg")
+        self.assertEqual(len(self.db_manager.get_projects_page()[0]), 2)
+    
+    def test_cursor_round_trip(self):
+        """Test encoding and decoding page cursors"""
+        project = Project(42, "Title", "Description", "image.jpg", "2025-10-17 19:12:08")
+        self.assertEqual(decode_cursor(encode_cursor(project)), ("2025-10-17 19:12:08", 42))
+        
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+    def test_search_projects_ranks_title_matches_first(self):
+        """Test that search is ranked and highlights matches"""
+        self.db_manager.add_project("Booking Portal", "Reserve a vehicle online", "a.jpg")
+        self.db_manager.add_project("Vehicle Tracker", "Tracks fleet locations", "b.jpg")
+        self.db_manager.add_project("Recipe App", "Cooking recipes", "c.jpg")
+        
+        results = self.db_manager.search_projects("vehicle")
+        
+        self.assertEqual([r.title for r in results], ["Vehicle Tracker", "Booking Portal"])
+        self.assertEqual(results[0].title_highlight, f"{HIGHLIGHT_START}Vehicle{HIGHLIGHT_END} Tracker")
+        self.assertIn(f"{HIGHLIGHT_START}vehicle{HIGHLIGHT_END}", results[1].snippet)
+    
+    def test_search_projects_matches_prefix_and_ignores_syntax(self):
+        """Test prefix matching on the last term and that FTS syntax is treated as text"""
+        self.db_manager.add_project("Vehicle Tracker", "Tracks fleet locations", "b.jpg")
+        
+        self.assertEqual(len(self.db_manager.search_projects("vehi")), 1)
+        self.assertEqual(self.db_manager.search_projects('" OR *'), [])
+        self.assertEqual(self.db_manager.search_projects("   "), [])
+    
+    def test_search_index_follows_updates_and_deletes(self):
+        """Test that the triggers keep the search index in sync"""
+        project_id = self.db_manager.add_project("Vehicle Tracker", "Tracks fleet locations", "b.jpg")
+        self.assertEqual(len(self.db_manager.search_projects("vehicle")), 1)
+        
+        self.db_manager.update_project(project_id, "Fleet Tracker", "Tracks fleet locations", "b.jpg")
+        self.assertEqual(self.db_manager.search_projects("vehicle"), [])
+        self.assertEqual(len(self.db_manager.search_projects("fleet")), 1)
+        
+        self.db_manager.delete_project(project_id)
+        self.assertEqual(self.db_manager.search_projects("fleet"), [])
+    
+    def test_search_index_backfills_existing_projects(self):
+        """Test that projects written before the search index existed are indexed"""
+        self.db_manager.add_project("Vehicle Tracker", "Tracks fleet locations", "b.jpg")
+        with self.db_manager.write_connection() as conn:
+            conn.executescript('''
+                DROP TRIGGER projects_fts_insert;
+                DROP TRIGGER projects_fts_delete;
+                DROP TRIGGER projects_fts_update;
+                DROP TABLE projects_fts;
+            ''')
+        self.db_manager.close()
+        
+        manager = DatabaseManager(self.db_path)
+        self.assertEqual(len(manager.search_projects("vehicle")), 1)
+        manager.close()
+    def test_bulk_add_projects(self):
+        """Test inserting projects from a generator in several batches"""
+        rows = ({'title': f'Project {i}', 'description': 'Description', 'image_file_name': 'img.jpg'}
+                for i in range(25))
+        self.db_manager.get_all_projects()
+        
+        count = self.db_manager.bulk_add_projects(rows, batch_size=10)
+        
+        self.assertEqual(count, 25)
+        self.assertEqual(len(self.db_manager.get_all_projects()), 25)
+        self.assertEqual(len(self.db_manager.search_projects('project')), 20)
+    
+    def test_bulk_add_projects_keeps_timestamps(self):
+        """Test that explicit timestamps are kept and missing ones default"""
+        self.db_manager.bulk_add_projects([
+            {'title': 'Old', 'description': 'Description', 'image_file_name': 'img.jpg',
+             'created_at': '2020-01-01 00:00:00', 'updated_at': '2020-01-02 00:00:00'},
+            {'title': 'New', 'description': 'Description', 'image_file_name': 'img.jpg',
+             'created_at': ''},
+        ])
+        
+        old, new = self.db_manager.get_project_by_id(1), self.db_manager.get_project_by_id(2)
+        self.assertEqual((old.created_at, old.updated_at),
+                         (datetime(2020, 1, 1), datetime(2020, 1, 2)))
+        self.assertIsNotNone(new.created_at)
+    
+    def test_bulk_add_projects_normalizes_timestamps(self):
+        """Test that ISO 8601 variants are stored in SQLite's format and bad ones rejected"""
+        self.db_manager.bulk_add_projects([
+            {'title': 'Zulu', 'description': 'Description', 'image_file_name': 'img.jpg',
+             'created_at': '2020-01-01T10:00:00Z'},
+            {'title': 'Offset', 'description': 'Description', 'image_file_name': 'img.jpg',
+             'created_at': '2020-01-01T12:00:00+01:00'},
+        ])
+        with self.db_manager.connection() as conn:
+            stored = [row[0] for row in conn.execute('SELECT created_at FROM projects ORDER BY id')]
+        self.assertEqual(stored, ['2020-01-01 10:00:00', '2020-01-01 11:00:00'])
+        
+        with self.assertRaises(ValueError):
+            self.db_manager.bulk_add_projects([
+                {'title': 'Bad', 'description': 'Description', 'image_file_name': 'img.jpg',
+                 'created_at': 'last tuesday'}])
+    
+    def test_iter_projects(self):
+        """Test streaming every project in id order across batches"""
+        for i in range(7):
+            self.db_manager.add_project(f"Project {i}", "Description", "image.jpg")
+        
+        projects = list(self.db_manager.iter_projects(batch_size=3))
+        
+        self.assertEqual([p.id for p in projects], list(range(1, 8)))
+        
+        resumed = list(self.db_manager.iter_projects(batch_size=3, after_id=5))
+        self.assertEqual([p.id for p in resumed], [6, 7])
+        self.assertEqual(resumed[0].to_dict(('id', 'title')), {'id': 6, 'title': 'Project 5'})
+    
+    def test_projects_version_tracks_writes(self):
+        """Test that every write moves the projects version forward"""
+        version, last_modified = self.db_manager.get_projects_version()
+        self.assertEqual(version, 0)
+        self.assertIsNone(last_modified)
+        
+        project_id = self.db_manager.add_project("Project 1", "Description", "image.jpg")
+        self.assertEqual(self.db_manager.get_projects_version()[0], 1)
+        self.db_manager.update_project(project_id, "Renamed", "Description", "image.jpg")
+        self.assertEqual(self.db_manager.get_projects_version()[0], 2)
+        self.db_manager.delete_project(project_id)
+        self.assertEqual(self.db_manager.get_projects_version()[0], 3)
+        self.db_manager.bulk_add_projects([
+            {'title': 'Old', 'description': 'Description', 'image_file_name': 'img.jpg',
+             'updated_at': '2001-01-01 00:00:00'}])
+        
+        version, last_modified = self.db_manager.get_projects_version()
+        self.assertEqual(version, 4)
+        self.assertGreater(last_modified, '2001-01-01 00:00:00')
+    
+    def test_projects_version_sees_other_processes(self):
+        """Test that the version moves for writes made through another manager"""
+        before = self.db_manager.get_projects_version()[0]
+        other = DatabaseManager(self.db_path)
+        other.add_project("Elsewhere", "Written by another worker", "img.jpg")
+        other.close()
+        
+        self.assertEqual(self.db_manager.get_projects_version()[0], before + 1)
+    
+    def test_add_contact_messages(self):
+        """Test that contact messages are inserted together and listed newest first"""
+        count = self.db_manager.add_contact_messages([
+            {'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com', 'message': 'First'},
+            {'first_name': 'Alan', 'last_name': 'Turing', 'email': 'alan@example.com', 'message': 'Second'},
+        ])
+        self.assertEqual(count, 2)
+        self.assertEqual(self.db_manager.add_contact_messages([]), 0)
+        
+        messages = self.db_manager.get_contact_messages()
+        self.assertEqual([m[4] for m in messages], ['Second', 'First'])
+        self.assertIsNotNone(messages[0][5])
+    
+    def test_records_are_typed(self):
+        """Test that reads return Project records with parsed dates and only the needed columns"""
+        project_id = self.db_manager.add_project("Typed", "Record with slots", "img.jpg")
+        
+        project = self.db_manager.get_project_by_id(project_id)
+        self.assertIsInstance(project, Project)
+        self.assertIsInstance(project.created_at, datetime)
+        self.assertIsInstance(project.updated_at, datetime)
+        self.assertFalse(hasattr(project, '__dict__'))
+        
+        listed = self.db_manager.get_all_projects()[0]
+        self.assertEqual((listed.id, listed.title, listed.created_at),
+                         (project.id, project.title, project.created_at))
+        self.assertIsNone(listed.updated_at)
+        self.assertIsInstance(self.db_manager.search_projects("typed")[0], SearchResult)
+        self.assertEqual(project.to_dict()['created_at'], project.created_at.strftime('%Y-%m-%d %H:%M:%S'))
+    
+    def test_project_columns(self):
+        """Test the columnar listing against the list of records"""
+        self.db_manager.bulk_add_projects(
+            {'title': f'Project {i}', 'description': 'Description', 'image_file_name': 'img.jpg',
+             'created_at': f'2024-01-{i + 1:02d} 08:30:00'}
+            for i in range(5))
+        
+        columns = self.db_manager.get_project_columns()
+        self.assertIsInstance(columns, ProjectColumns)
+        self.assertEqual(len(columns), 5)
+        self.assertEqual(list(columns), self.db_manager.get_all_projects())
+        self.assertEqual(columns[0].created_at, datetime(2024, 1, 5, 8, 30))
+        self.assertIs(columns.image_file_names[0], columns.image_file_names[4])
+    
+    def test_async_reads(self):
+        """Test that the async wrapper returns what the manager returns"""
+        project_id = self.db_manager.add_project("Async Project", "Read off the event loop", "img.jpg")
+        async_db = AsyncDatabaseManager(self.db_manager)
+        
+        async def read():
+            return await asyncio.gather(
+                async_db.get_project_by_id(project_id),
+                async_db.get_projects_page(limit=5),
+                async_db.search_projects("async"),
+                async_db.project_exists(project_id))
+        
+        project, page, results, exists = asyncio.run(read())
+        async_db.close()
+        self.assertEqual(project, self.db_manager.get_project_by_id(project_id))
+        self.assertEqual(page, self.db_manager.get_projects_page(limit=5))
+        self.assertEqual(results[0].id, project_id)
+        self.assertTrue(exists)
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+    def test_after_fork_uses_fresh_connections(self):
+        """Test that a forked child can read and write after after_fork"""
+        self.db_manager.add_project("Before Fork", "Cached in the parent", "img.jpg")
+        self.assertEqual(len(self.db_manager.get_all_projects()), 1)
+        
+        pid = os.fork()
+        if pid == 0:
+            ok = False
+            try:
+                self.db_manager.after_fork()
+                self.db_manager.add_project("In Child", "Written after fork", "img.jpg")
+                ok = len(self.db_manager.get_all_projects()) == 2
+            finally:
+                os._exit(0 if ok else 1)
+        
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        titles = [project.title for project in self.db_manager.get_all_projects()]
+        self.assertEqual(titles, ["In Child", "Before Fork"])
+
+class TestQueryCache(unittest.TestCase):
+    """Test cases for the QueryCache class"""
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = QueryCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+    
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL"""
+        cache = QueryCache(ttl=-1)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+    
+    def test_stale_load_is_not_stored(self):
+        """Test that a value loaded before an invalidation is discarded"""
+        cache = QueryCache()
+        generation = cache.generation
+        cache.clear()
+        cache.set('a', 'stale', generation)
+        self.assertIsNone(cache.get('a'))
+
 if __name__ == '__main__':
     unittest.main()
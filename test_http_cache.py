@@ -0,0 +1,185 @@
+import unittest
+import os
+import sys
+import tempfile
+
+from flask import Flask, flash, render_template_string
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime, timezone
+
+from http_cache import ResponseCache, CachedPage, conditional, fingerprint_directory
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the ResponseCache class"""
+    
+    def setUp(self):
+        """Set up a small app with one cached page"""
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+        self.app.config['TESTING'] = True
+        self.cache = ResponseCache(self.app)
+        self.renders = 0
+        
+        @self.app.route('/page')
+        @self.cache.cached
+        def page():
+            self.renders += 1
+            return render_template_string(
+                '{% for m in get_flashed_messages() %}{{ m }}{% endfor %}page {{ n }}', n=self.renders)
+        
+        @self.app.route('/flash')
+        def set_flash():
+            flash('hello')
+            return 'ok'
+        
+        self.client = self.app.test_client()
+    
+    def test_second_request_is_a_hit(self):
+        """Test that a cached page is replayed without rendering"""
+        first = self.client.get('/page')
+        second = self.client.get('/page')
+        
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(second.data, b'page 1')
+        self.assertEqual(second.mimetype, 'text/html')
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+    
+    def test_key_includes_query_and_vary_headers(self):
+        """Test that query strings and varying headers get separate entries"""
+        self.client.get('/page')
+        self.client.get('/page?x=1')
+        self.client.get('/page', headers={'Accept-Language': 'fr'})
+        
+        self.assertEqual(self.renders, 3)
+    
+    def test_pending_flashes_bypass_cache(self):
+        """Test that a page carrying flashed messages is rendered fresh"""
+        self.client.get('/page')
+        self.client.get('/flash')
+        
+        response = self.client.get('/page')
+        
+        self.assertEqual(response.data, b'hellopage 2')
+        self.assertNotIn('X-Cache', response.headers)
+        self.assertEqual(self.client.get('/page').data, b'page 1')
+    
+    def test_disabled(self):
+        """Test that the cache can be switched off"""
+        self.app.config['PAGE_CACHE_ENABLED'] = False
+        self.client.get('/page')
+        self.client.get('/page')
+        self.assertEqual(self.renders, 2)
+    
+    def test_size_bounded_eviction(self):
+        """Test that the least recently used page is evicted to stay under max_bytes"""
+        cache = ResponseCache(max_bytes=10)
+        cache.set('a', CachedPage(b'12345', 'text/html'))
+        cache.set('b', CachedPage(b'12345', 'text/html'))
+        cache.get('a')
+        cache.set('c', CachedPage(b'12345', 'text/html'))
+        cache.set('huge', CachedPage(b'x' * 11, 'text/html'))
+        
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNone(cache.get('huge'))
+        self.assertEqual(cache.stats()['bytes'], 10)
+    
+    def test_prerender(self):
+        """Test that prerendering fills the cache before the first visitor"""
+        self.cache.prerender(self.app, ['/page'])
+        
+        response = self.client.get('/page')
+        
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+
+    def test_cached_page_etag_gives_304(self):
+        """Test that a client holding the cached page's ETag gets a 304"""
+        etag = self.client.get('/page').headers['ETag']
+        
+        response = self.client.get('/page', headers={'If-None-Match': etag})
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(self.renders, 1)
+
+class TestConditional(unittest.TestCase):
+    """Test cases for the conditional decorator"""
+    
+    def setUp(self):
+        """Set up an app with a view guarded by fixed validators"""
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+        self.calls = 0
+        self.version = 'v1'
+        self.modified = datetime(2025, 10, 17, 19, 12, 8, tzinfo=timezone.utc)
+        
+        @self.app.route('/listing')
+        @conditional(lambda: (self.version, self.modified))
+        def listing():
+            self.calls += 1
+            return 'listing'
+        
+        self.client = self.app.test_client()
+    
+    def test_full_response_has_validators(self):
+        """Test that a plain GET gets ETag, Last-Modified and no-cache"""
+        response = self.client.get('/listing')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['ETag'], '"v1"')
+        self.assertEqual(response.headers['Last-Modified'], 'Fri, 17 Oct 2025 19:12:08 GMT')
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+    
+    def test_matching_etag_skips_view(self):
+        """Test that If-None-Match short-circuits to 304 without running the view"""
+        response = self.client.get('/listing', headers={'If-None-Match': '"v1"'})
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.calls, 0)
+    
+    def test_changed_version_runs_view(self):
+        """Test that a stale ETag gets a full response"""
+        self.version = 'v2'
+        response = self.client.get('/listing', headers={'If-None-Match': '"v1"'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.calls, 1)
+    
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is honoured when no ETag is sent"""
+        not_modified = self.client.get('/listing', headers={'If-Modified-Since': 'Fri, 17 Oct 2025 19:12:08 GMT'})
+        modified = self.client.get('/listing', headers={'If-Modified-Since': 'Fri, 17 Oct 2025 19:00:00 GMT'})
+        
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(modified.status_code, 200)
+
+class TestFingerprint(unittest.TestCase):
+    """Test cases for the build identifier"""
+    
+    def test_covers_extra_files(self):
+        """Test that rebuilding an asset manifest changes the build id"""
+        with tempfile.TemporaryDirectory() as root:
+            templates = os.path.join(root, 'templates')
+            os.makedirs(templates)
+            with open(os.path.join(templates, 'page.html'), 'w') as f:
+                f.write('page')
+            manifest = os.path.join(root, 'manifest.json')
+            
+            unbuilt, _ = fingerprint_directory(templates, [manifest])
+            with open(manifest, 'w') as f:
+                f.write('{"css/site.css": "dist/css/site.1.css"}')
+            built, _ = fingerprint_directory(templates, [manifest])
+            with open(manifest, 'w') as f:
+                f.write('{"css/site.css": "dist/css/site.2.css"}')
+            rebuilt, _ = fingerprint_directory(templates, [manifest])
+        
+        self.assertEqual(len({unbuilt, built, rebuilt}), 3)
+
+if __name__ == '__main__':
+    unittest.main()
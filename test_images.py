@@ -0,0 +1,92 @@
+import unittest
+import os
+import tempfile
+import sys
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from images import ImagePipeline, Image
+
+@unittest.skipIf(Image is None, 'Pillow is not installed')
+class TestImagePipeline(unittest.TestCase):
+    """Test cases for the ImagePipeline class"""
+    
+    def setUp(self):
+        """Set up a source folder with one 600x400 image"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, 'images')
+        self.output = os.path.join(self.tmp.name, 'derived')
+        os.makedirs(self.source)
+        Image.new('RGB', (600, 400), (0, 200, 255)).save(os.path.join(self.source, 'shot.jpg'))
+        self.pipeline = ImagePipeline(self.source, self.output, formats=('webp',))
+    
+    def tearDown(self):
+        """Stop the worker pool and clean up"""
+        self.pipeline.shutdown()
+        self.tmp.cleanup()
+    
+    def url(self, name):
+        return '/derived/' + name
+    
+    def test_variants_built_in_background(self):
+        """Test that a miss queues generation and a later lookup returns srcsets"""
+        self.assertIsNone(self.pipeline.variants('shot.jpg', self.url))
+        self.pipeline.shutdown(wait=True)
+        
+        variants = self.pipeline.variants('shot.jpg', self.url)
+        
+        self.assertEqual(variants.sources[0][0], 'image/webp')
+        self.assertIn('.240w.webp 240w', variants.sources[0][1])
+        self.assertRegex(variants.fallback, r'^/derived/shot\.[0-9a-f]{12}\.120w\.jpg$')
+        self.assertNotEqual(self.pipeline.state(), '0')
+    
+    def test_generate_resizes_without_upscaling(self):
+        """Test output sizes, aspect ratio and that widths never exceed the source"""
+        pipeline = ImagePipeline(self.source, self.output, widths=(120, 480, 1200), formats=('webp',))
+        index = pipeline.generate('shot.jpg')
+        
+        self.assertEqual([w for w, _ in index['formats']['webp']], [120, 480, 600])
+        with Image.open(os.path.join(self.output, index['formats']['jpeg'][0][1])) as thumbnail:
+            self.assertEqual(thumbnail.size, (120, 80))
+    
+    def test_submit_deduplicates_and_skips_built(self):
+        """Test that repeated submits share a job and finished images are not rebuilt"""
+        first = self.pipeline.submit('shot.jpg')
+        second = self.pipeline.submit('shot.jpg')
+        first.result()
+        
+        self.assertIs(first, second)
+        self.assertIsNone(self.pipeline.submit('shot.jpg'))
+    
+    def test_edited_source_gets_new_derivatives(self):
+        """Test that derivatives are keyed by the source content"""
+        self.pipeline.generate('shot.jpg')
+        Image.new('RGB', (300, 200), (255, 0, 0)).save(os.path.join(self.source, 'shot.jpg'))
+        os.utime(os.path.join(self.source, 'shot.jpg'), (1, 1))
+        
+        self.assertIsNone(self.pipeline.variants('shot.jpg', self.url))
+    
+    def test_undecodable_source_is_not_retried(self):
+        """Test that a failed build is logged once and leaves the state unchanged"""
+        with open(os.path.join(self.source, 'resume.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4 not an image')
+        
+        with self.assertLogs('images', 'WARNING') as logs:
+            future = self.pipeline.submit('resume.pdf')
+            self.pipeline.shutdown(wait=True)
+        
+        self.assertIsNotNone(future.exception())
+        self.assertIn('resume.pdf', logs.output[0])
+        self.assertIsNone(self.pipeline.submit('resume.pdf'))
+        self.assertIsNone(self.pipeline.variants('resume.pdf', self.url))
+        self.assertEqual(self.pipeline.state(), '0')
+    
+    def test_rejects_missing_and_unsafe_paths(self):
+        """Test that names outside the source folder are ignored"""
+        self.assertIsNone(self.pipeline.submit('missing.jpg'))
+        self.assertIsNone(self.pipeline.submit('../images/shot.jpg'))
+        self.assertIsNone(self.pipeline.variants('../../etc/passwd', self.url))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+import time
+
+from flask import Flask, render_template_string
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import Metrics, Histogram
+
+class FakeDatabase:
+    def slow_query(self):
+        time.sleep(0.002)
+        return ['row']
+
+class TestHistogram(unittest.TestCase):
+    """Test cases for the Histogram class"""
+    
+    def test_quantile_interpolates_within_bucket(self):
+        """Test quantile estimates from bucket counts"""
+        histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+        for value in (0.5, 1.5, 1.5, 3.0):
+            histogram.observe(value)
+        
+        self.assertAlmostEqual(histogram.quantile(0.5), 1.5)
+        self.assertAlmostEqual(histogram.quantile(1.0), 4.0)
+        self.assertEqual(Histogram().quantile(0.5), 0.0)
+    
+    def test_values_above_last_bucket(self):
+        """Test that overflow observations land in the +Inf bucket"""
+        histogram = Histogram(buckets=(1.0,))
+        histogram.observe(5.0)
+        counts, total, count = histogram.snapshot()
+        
+        self.assertEqual(counts, [0, 1])
+        self.assertEqual((total, count), (5.0, 1))
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for request instrumentation and the /metrics endpoint"""
+    
+    def setUp(self):
+        """Set up an app with one route that queries and renders"""
+        self.app = Flask(__name__)
+        self.metrics = Metrics(self.app)
+        self.db = FakeDatabase()
+        self.metrics.instrument(self.db, ('slow_query',))
+        
+        @self.app.route('/page')
+        def page():
+            rows = self.db.slow_query()
+            return render_template_string('{{ rows|length }}', rows=rows)
+        
+        self.client = self.app.test_client()
+    
+    def test_request_is_counted_by_status(self):
+        """Test request counters and latency histogram by endpoint"""
+        self.client.get('/page')
+        self.client.get('/missing')
+        body = self.client.get('/metrics').get_data(as_text=True)
+        
+        self.assertIn('http_requests_total{endpoint="page",method="GET",status="200"} 1', body)
+        self.assertIn('http_requests_total{endpoint="<unmatched>",method="GET",status="404"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{endpoint="page"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="page",le="+Inf"} 1', body)
+        self.assertIn('http_request_duration_seconds_quantile{endpoint="page",quantile="0.99"}', body)
+    
+    def test_db_and_template_time_are_split(self):
+        """Test that DB calls and template rendering are timed separately"""
+        self.client.get('/page')
+        
+        db_time = self.metrics.request_db.labels('page').snapshot()[1]
+        template_count = self.metrics.request_template.labels('page').snapshot()[2]
+        
+        self.assertGreaterEqual(db_time, 0.002)
+        self.assertEqual(template_count, 1)
+        self.assertEqual(self.metrics.db_calls.labels('slow_query').snapshot()[2], 1)
+    
+    def test_in_flight_returns_to_zero(self):
+        """Test that the in-flight gauge is released after the request"""
+        self.client.get('/page')
+        self.assertEqual(self.metrics.in_flight.labels('page').value, 0)
+    
+    def test_instrumented_calls_work_outside_requests(self):
+        """Test that wrapped methods still work without a request context"""
+        self.assertEqual(self.db.slow_query(), ['row'])
+    
+    def test_collectors_and_content_type(self):
+        """Test extra collectors and the Prometheus content type"""
+        self.metrics.add_collector(lambda: [('custom_total', 'counter', 'A custom counter.', 7)])
+        response = self.client.get('/metrics')
+        
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE custom_total counter\ncustom_total 7', response.get_data(as_text=True))
+
+if __name__ == '__main__':
+    unittest.main()
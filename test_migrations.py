@@ -0,0 +1,98 @@
+import unittest
+import os
+import tempfile
+import sqlite3
+import sys
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from migrations import Backfill, Migration, Migrator, user_version
+
+class TestMigrator(unittest.TestCase):
+    """Test cases for the user_version migration engine"""
+    
+    def setUp(self):
+        """Set up a database with a table of 25 rows"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, 'test.db'))
+        self.conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)')
+        self.conn.executemany('INSERT INTO items (name) VALUES (?)', [(f'Item {i}',) for i in range(25)])
+        self.conn.commit()
+        self.migrations = [
+            Migration(1, 'Add a column', lambda cursor: cursor.execute('ALTER TABLE items ADD COLUMN lower_name TEXT')),
+            Backfill(2, 'Fill the column', 'items',
+                     'UPDATE items SET lower_name = lower(name) WHERE id > ? AND id <= ?', batch_size=10),
+            Migration(3, 'Index the column',
+                      lambda cursor: cursor.execute('CREATE INDEX idx_items_lower_name ON items (lower_name)'),
+                      table='items'),
+        ]
+    
+    def tearDown(self):
+        """Clean up the temporary database"""
+        self.conn.close()
+        self.tmp.cleanup()
+    
+    def test_migrate_runs_pending_steps_in_order(self):
+        """Test that every migration runs once and user_version records the last"""
+        migrator = Migrator(self.migrations)
+        batches = []
+        
+        applied = migrator.migrate(self.conn, progress=lambda migration, rows: batches.append(rows))
+        
+        self.assertEqual([migration.version for migration in applied], [1, 2, 3])
+        self.assertEqual(user_version(self.conn), 3)
+        self.assertEqual(batches, [10, 20, 25])
+        missing = self.conn.execute('SELECT COUNT(*) FROM items WHERE lower_name IS NULL').fetchone()[0]
+        self.assertEqual(missing, 0)
+        self.assertEqual(migrator.migrate(self.conn), [])
+    
+    def test_interrupted_backfill_resumes(self):
+        """Test that a failed backfill keeps finished batches and carries on from them"""
+        calls = []
+        
+        def fail_on_second_batch(value):
+            calls.append(value)
+            if len(calls) == 11:
+                raise ValueError('interrupted')
+            return value.lower()
+        
+        self.conn.create_function('flaky_lower', 1, fail_on_second_batch)
+        self.migrations[1] = Backfill(2, 'Fill the column', 'items',
+                                      'UPDATE items SET lower_name = flaky_lower(name) WHERE id > ? AND id <= ?',
+                                      batch_size=10)
+        migrator = Migrator(self.migrations)
+        
+        with self.assertRaises(sqlite3.OperationalError):
+            migrator.migrate(self.conn)
+        self.assertEqual(user_version(self.conn), 1)
+        self.assertEqual(self.migrations[1].resume_point(self.conn), 10)
+        
+        migrator.migrate(self.conn)
+        
+        self.assertEqual(user_version(self.conn), 3)
+        # The first batch was not redone
+        self.assertEqual(len(calls), 10 + 1 + 15)
+        self.assertEqual(self.migrations[1].resume_point(self.conn), 0)
+    
+    def test_estimate_leaves_database_unchanged(self):
+        """Test that a dry run scales sampled timings without migrating"""
+        migrator = Migrator(self.migrations)
+        
+        estimates = migrator.estimate(self.conn, sample_rows=5)
+        
+        self.assertEqual([estimate['version'] for estimate in estimates], [1, 2, 3])
+        self.assertEqual([estimate['rows'] for estimate in estimates], [0, 25, 25])
+        self.assertTrue(estimates[1]['batched'])
+        self.assertTrue(all(estimate['seconds'] >= 0 for estimate in estimates))
+        self.assertEqual(user_version(self.conn), 0)
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(items)')]
+        self.assertNotIn('lower_name', columns)
+    
+    def test_versions_must_be_sequential(self):
+        """Test that gaps or reordering in the migration list are rejected"""
+        with self.assertRaises(ValueError):
+            Migrator([self.migrations[0], self.migrations[2]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import passwords
+from passwords import HashingUnavailable, PasswordHasher
+
+# Cheap enough to keep the tests fast
+FAST_METHOD = 'scrypt:1024:8:1'
+
+class TestPasswordHasher(unittest.TestCase):
+    """Test cases for the PasswordHasher class"""
+    
+    def setUp(self):
+        """Create a hasher with two workers"""
+        self.hasher = PasswordHasher(FAST_METHOD, max_workers=2, max_pending=2, timeout=5.0)
+    
+    def tearDown(self):
+        """Stop the worker threads"""
+        self.hasher.shutdown()
+    
+    def test_hash_and_verify(self):
+        """Test that hashes use the configured method and verify"""
+        password_hash = self.hasher.hash('password123')
+        self.assertTrue(password_hash.startswith(FAST_METHOD + '$'))
+        self.assertTrue(PasswordHasher.verify(password_hash, 'password123'))
+        self.assertFalse(PasswordHasher.verify(password_hash, 'password124'))
+        self.assertEqual(self.hasher.hashed, 1)
+        self.assertEqual(self.hasher.in_flight(), 0)
+    
+    def test_rejects_when_pool_is_full(self):
+        """Test that callers beyond max_pending are turned away immediately"""
+        release = threading.Event()
+        started = threading.Barrier(3)
+        
+        def slow_hash(password, method):
+            started.wait()
+            release.wait(5)
+            return 'hash'
+        
+        with patch.object(passwords, 'generate_password_hash', slow_hash):
+            callers = [threading.Thread(target=self.hasher.hash, args=('pw',)) for _ in range(2)]
+            for caller in callers:
+                caller.start()
+            started.wait()
+            with self.assertRaises(HashingUnavailable):
+                self.hasher.hash('pw')
+            release.set()
+            for caller in callers:
+                caller.join()
+        
+        self.assertEqual(self.hasher.rejected, 1)
+        self.assertEqual(self.hasher.hashed, 2)
+    
+    def test_timeout(self):
+        """Test that a slow hash raises instead of blocking the caller"""
+        hasher = PasswordHasher(FAST_METHOD, max_workers=1, max_pending=1, timeout=0.05)
+        release = threading.Event()
+        with patch.object(passwords, 'generate_password_hash', lambda *args: release.wait(5)):
+            with self.assertRaises(HashingUnavailable):
+                hasher.hash('pw')
+            self.assertEqual(hasher.in_flight(), 1)
+            release.set()
+            hasher.shutdown()
+        
+        self.assertEqual(hasher.timed_out, 1)
+        self.assertEqual(hasher.in_flight(), 0)
+    
+    def test_rejects_unknown_method(self):
+        """Test that a misconfigured method fails at construction"""
+        with self.assertRaises(ValueError):
+            PasswordHasher('md5')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ratelimit
+from ratelimit import MemoryBackend, RateLimiter, SQLiteBackend, parse_limit
+
+class FakeClock:
+    """Stands in for time.monotonic and time.time"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class BackendTests:
+    """Behaviour shared by every bucket backend"""
+    
+    def setUp(self):
+        """Freeze the clock seen by the backend"""
+        self.clock = FakeClock()
+        patcher = patch.multiple(ratelimit.time, monotonic=self.clock, time=self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = self.make_backend()
+    
+    def test_burst_then_refill(self):
+        """Test that a bucket allows its burst, then one token per 1/rate seconds"""
+        self.assertEqual([self.backend.take('k', 1.0, 3) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(self.backend.take('k', 1.0, 3), 1.0)
+        self.clock.now += 0.5
+        self.assertAlmostEqual(self.backend.take('k', 1.0, 3), 0.5)
+        self.clock.now += 0.5
+        self.assertEqual(self.backend.take('k', 1.0, 3), 0)
+    
+    def test_keys_are_independent(self):
+        """Test that one client's bucket doesn't drain another's"""
+        self.backend.take('a', 1.0, 1)
+        self.assertGreater(self.backend.take('a', 1.0, 1), 0)
+        self.assertEqual(self.backend.take('b', 1.0, 1), 0)
+    
+    def test_idle_buckets_are_evicted(self):
+        """Test that refilled buckets are dropped by the periodic sweep"""
+        for i in range(20):
+            self.backend.take(f'client-{i}', 1.0, 5)
+        self.assertEqual(len(self.backend), 20)
+        self.clock.now += 120
+        for i in range(40):
+            self.backend.take('busy', 1000.0, 5)
+        self.assertLessEqual(len(self.backend), 5)
+
+class TestMemoryBackend(BackendTests, unittest.TestCase):
+    """Test cases for the MemoryBackend class"""
+    
+    def make_backend(self):
+        return MemoryBackend(stripes=4, sweep_interval=60)
+    
+    def test_idle_buckets_are_evicted(self):
+        """Test that refilled buckets are dropped by each stripe's sweep"""
+        for i in range(20):
+            self.backend.take(f'client-{i}', 1.0, 5)
+        self.clock.now += 120
+        # Touch every stripe so each one sweeps
+        for i in range(20):
+            self.backend.take(f'client-{i}', 1.0, 5)
+        self.clock.now += 120
+        self.backend.take('client-0', 1.0, 5)
+        self.assertLess(len(self.backend), 20)
+
+class TestSQLiteBackend(BackendTests, unittest.TestCase):
+    """Test cases for the SQLiteBackend class"""
+    
+    def make_backend(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        backend = SQLiteBackend(os.path.join(self.tmp.name, 'buckets.db'), sweep_interval=60)
+        self.addCleanup(backend.close)
+        return backend
+    
+    def test_buckets_are_shared_between_instances(self):
+        """Test that two processes' backends draw from the same bucket"""
+        other = SQLiteBackend(self.backend.path)
+        self.addCleanup(other.close)
+        self.assertEqual(self.backend.take('k', 1.0, 1), 0)
+        self.assertGreater(other.take('k', 1.0, 1), 0)
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the RateLimiter class"""
+    
+    def setUp(self):
+        """Create an app with one limited view"""
+        self.app = Flask(__name__)
+        self.limiter = RateLimiter(app=self.app)
+        
+        @self.app.route('/write', methods=['GET', 'POST'])
+        @self.limiter.limit(per_client='2/minute', overall='3/minute')
+        def write():
+            return 'ok'
+        
+        self.client = self.app.test_client()
+    
+    def post(self, addr):
+        return self.client.post('/write', environ_base={'REMOTE_ADDR': addr})
+    
+    def test_per_client_limit_and_retry_after(self):
+        """Test that a client over its limit gets 429 with Retry-After"""
+        self.assertEqual([self.post('10.0.0.1').status_code for _ in range(2)], [200, 200])
+        response = self.post('10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '30')
+        self.assertEqual(self.limiter.rejected, 1)
+        self.assertEqual(self.client.get('/write').status_code, 200)
+    
+    def test_overall_limit(self):
+        """Test that the overall bucket caps many clients together"""
+        statuses = [self.post(f'10.0.0.{i}').status_code for i in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+    
+    def test_config_overrides_and_disable(self):
+        """Test RATE_LIMITS overrides and RATE_LIMIT_ENABLED"""
+        self.app.config['RATE_LIMITS'] = {'write': {'per_client': '1/hour'}}
+        self.assertEqual(self.post('10.0.0.1').status_code, 200)
+        self.assertEqual(self.post('10.0.0.1').status_code, 429)
+        self.app.config['RATE_LIMIT_ENABLED'] = False
+        self.assertEqual(self.post('10.0.0.1').status_code, 200)
+    
+    def test_parse_limit(self):
+        """Test rate limit strings"""
+        self.assertEqual(parse_limit('5/minute'), (5 / 60, 5))
+        self.assertEqual(parse_limit('10/seconds'), (10.0, 10))
+        for bad in ('five/minute', '5/fortnight', '0/second'):
+            with self.assertRaises(ValueError):
+                parse_limit(bad)
+
+if __name__ == '__main__':
+    unittest.main()
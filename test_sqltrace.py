@@ -0,0 +1,91 @@
+import unittest
+import os
+import tempfile
+import sqlite3
+import sys
+
+from flask import Flask, g
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from DAL import DatabaseManager
+from sqltrace import QueryTracer, TracedConnection
+
+class TestQueryTracer(unittest.TestCase):
+    """Test cases for SQL tracing, the slow-query log and query budgets"""
+    
+    def setUp(self):
+        """Set up an app whose DatabaseManager is traced"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.tracer = QueryTracer(self.app, slow_ms=1000, budget=2)
+        self.db_manager = DatabaseManager(os.path.join(self.tmp.name, 'projects.db'),
+                                          cache_ttl=0, tracer=self.tracer)
+        self.db_manager.ensure_schema()
+        self.ids = [self.db_manager.add_project(f'Project {i}', 'Description', 'img.jpg') for i in range(3)]
+        
+        @self.app.route('/list')
+        def listing():
+            projects = self.db_manager.get_all_projects()
+            g.traced = list(g._sql_queries)
+            return str(len(projects))
+        
+        @self.app.route('/one-by-one')
+        def one_by_one():
+            return str([self.db_manager.get_project_by_id(project_id).title for project_id in self.ids])
+        
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up the temporary database"""
+        self.db_manager.close()
+        self.tmp.cleanup()
+    
+    def test_untraced_connections_are_plain(self):
+        """Test that without a tracer connections are ordinary sqlite3 connections"""
+        db_manager = DatabaseManager(os.path.join(self.tmp.name, 'plain.db'))
+        try:
+            with db_manager.connection() as conn:
+                self.assertIs(type(conn), sqlite3.Connection)
+            with self.db_manager.connection() as conn:
+                self.assertIsInstance(conn, TracedConnection)
+        finally:
+            db_manager.close()
+    
+    def test_request_statements_are_recorded(self):
+        """Test that statements are timed, counted and reported in Server-Timing"""
+        with self.app.test_client() as client:
+            response = client.get('/list')
+            queries = g.traced
+        
+        self.assertEqual(response.data, b'3')
+        select = next(query for query in queries if 'FROM projects' in query.sql)
+        self.assertEqual(select.rows, 3)
+        self.assertEqual(select.endpoint, 'listing')
+        self.assertGreater(select.seconds, 0)
+        self.assertIn(f'desc="{len(queries)} queries"', response.headers['Server-Timing'])
+    
+    def test_slow_statements_are_logged_with_plan(self):
+        """Test that statements over the threshold are logged with EXPLAIN QUERY PLAN"""
+        self.tracer.slow_seconds = 0
+        
+        with self.assertLogs('sqltrace', 'WARNING') as logs:
+            self.client.get('/list')
+        
+        slow = [line for line in logs.output if 'Slow SQL' in line and 'FROM projects' in line]
+        self.assertTrue(slow)
+        self.assertIn('SCAN projects', slow[0])
+        self.assertGreater(self.tracer.slow_queries, 0)
+    
+    def test_query_budget_flags_repeated_statements(self):
+        """Test that a request over its budget is warned about, naming the repeated query"""
+        with self.assertLogs('sqltrace', 'WARNING') as logs:
+            self.client.get('/one-by-one')
+        
+        self.assertEqual(self.tracer.over_budget, 1)
+        self.assertIn('one_by_one ran', logs.output[-1])
+        self.assertIn('3x SELECT id, title', logs.output[-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+import unittest
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from write_queue import BatchWriter
+
+class TestBatchWriter(unittest.TestCase):
+    """Test cases for the BatchWriter class"""
+    
+    def setUp(self):
+        """Record every batch handed to the writer"""
+        self.batches = []
+        self.writer = BatchWriter(self.batches.append, max_queue=100, batch_size=10, max_delay=0.5)
+    
+    def tearDown(self):
+        """Stop the writer thread"""
+        self.writer.close()
+    
+    def test_items_are_grouped_into_batches(self):
+        """Test that queued items are written in batches of at most batch_size"""
+        for i in range(25):
+            self.assertTrue(self.writer.submit(i))
+        self.writer.close()
+        
+        self.assertEqual([item for batch in self.batches for item in batch], list(range(25)))
+        self.assertTrue(all(len(batch) <= 10 for batch in self.batches))
+        self.assertLess(len(self.batches), 25)
+        self.assertEqual(self.writer.written, 25)
+    
+    def test_partial_batch_is_written_after_max_delay(self):
+        """Test that a lone item doesn't wait for a full batch"""
+        writer = BatchWriter(self.batches.append, batch_size=10, max_delay=0.01)
+        writer.submit('only')
+        for _ in range(200):
+            if self.batches:
+                break
+            threading.Event().wait(0.01)
+        writer.close()
+        
+        self.assertEqual(self.batches, [['only']])
+    
+    def test_full_queue_rejects_instead_of_blocking(self):
+        """Test backpressure when the writer can't keep up"""
+        release = threading.Event()
+        writer = BatchWriter(lambda batch: release.wait(5), max_queue=2, batch_size=1, max_delay=0)
+        results = [writer.submit(i, timeout=0.01) for i in range(6)]
+        release.set()
+        writer.close()
+        
+        self.assertIn(False, results)
+        self.assertEqual(writer.rejected, results.count(False))
+        self.assertEqual(writer.written, results.count(True))
+    
+    def test_failed_batch_is_counted(self):
+        """Test that a failing write doesn't stop the writer thread"""
+        calls = []
+        
+        def write(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise RuntimeError('disk full')
+        
+        writer = BatchWriter(write, batch_size=1, max_delay=0)
+        with self.assertLogs('write_queue', 'ERROR'):
+            writer.submit('first')
+            writer.submit('second')
+            writer.close()
+        
+        self.assertEqual(writer.failed, 1)
+        self.assertEqual(writer.written, 1)
+
+if __name__ == '__main__':
+    unittest.main()
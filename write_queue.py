@@ -0,0 +1,117 @@
+"""Background batching of writes that don't need to finish inside a request"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Tells the writer thread to flush what it has and exit
+_STOP = object()
+
+
+class BatchWriter:
+    """Bounded queue drained by one thread that writes items in batches
+
+    `write_batch` receives a list of queued items and should write them
+    in a single transaction. A batch is written once it holds
+    `batch_size` items or its oldest item has waited `max_delay` seconds.
+    """
+
+    def __init__(self, write_batch, max_queue=1000, batch_size=100, max_delay=0.05):
+        """Create a writer; its thread starts with the first submitted item"""
+        if max_queue < 1 or batch_size < 1:
+            raise ValueError('max_queue and batch_size must be at least 1')
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self.batches = 0
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, item, timeout=0.1):
+        """Queue `item` for writing; returns False if the queue stayed full
+
+        Waits at most `timeout` seconds for room, so a burst of submissions
+        slows down the requests making them instead of growing the queue
+        without bound or holding up anything else.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put(item, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        return True
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            stopping = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stopping:
+                return
+
+    def _write(self, batch):
+        try:
+            self.write_batch(batch)
+        except Exception:
+            logger.exception('Failed to write a batch of %d queued items', len(batch))
+            with self._lock:
+                self.failed += len(batch)
+        else:
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+
+    def pending(self):
+        """Approximate number of items waiting to be written"""
+        return self._queue.qsize()
+
+    def close(self, timeout=10.0):
+        """Write everything already queued and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        atexit.unregister(self.close)
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning('Batch writer still backlogged at shutdown; %d items unwritten', self.pending())
+            return
+        thread.join(timeout)
+
+    def after_fork(self):
+        """Drop the queue and thread inherited from the parent process"""
+        self._queue = queue.Queue(self.max_queue)
+        self._thread = None
+        self._lock = threading.Lock()